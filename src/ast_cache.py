@@ -0,0 +1,163 @@
+import hashlib
+import os
+import struct
+import tempfile
+from array import array
+
+from htmlnode import LeafNode, ParentNode
+from template import rewrite_srcset, rewrite_url
+
+# Bump whenever parsing changes the shape of the trees it produces.
+PARSER_VERSION = 2
+AST_FORMAT_VERSION = 1
+MAGIC = b"SSGAST"
+HEADER = struct.Struct("<6sHHII")
+
+LEAF = 0
+PARENT = 1
+# Attributes that carry site-relative urls; the basepath is applied on load.
+URL_PROPS = ("href", "src")
+
+
+def ast_key(markdown, salt=""):
+    digest = hashlib.sha256(f"{PARSER_VERSION}\0{AST_FORMAT_VERSION}\0{salt}\0".encode())
+    digest.update(markdown.encode())
+    return digest.hexdigest()
+
+
+def _props_items(props):
+    if props is None:
+        return ()
+    return tuple(props.items()) if isinstance(props, dict) else tuple(props)
+
+
+def encode_tree(root):
+    strings = {}
+    ops = array('I')
+
+    def intern(text):
+        if text is None:
+            return 0
+        index = strings.get(text)
+        if index is None:
+            index = strings[text] = len(strings) + 1
+        return index
+
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        props = _props_items(node.props)
+        if isinstance(node, ParentNode):
+            ops.extend((PARENT, intern(node.tag), len(node.children), len(props)))
+            stack.extend(reversed(node.children))
+        elif isinstance(node, LeafNode):
+            ops.extend((LEAF, intern(node.tag), intern(node.value), len(props)))
+        else:
+            raise ValueError(f"cannot encode node type: {type(node).__name__}")
+        for name, value in props:
+            ops.extend((intern(name), intern(value)))
+
+    encoded = [text.encode() for text in strings]
+    lengths = array('I', (len(data) for data in encoded))
+    return b"".join((
+        HEADER.pack(MAGIC, AST_FORMAT_VERSION, PARSER_VERSION, len(encoded), len(ops)),
+        lengths.tobytes(),
+        ops.tobytes(),
+        b"".join(encoded),
+    ))
+
+
+def _decode_prop(name, value, basepath):
+    if name in URL_PROPS and value is not None:
+        value = rewrite_url(value, basepath)
+    elif name == "srcset" and value is not None:
+        value = rewrite_srcset(value, basepath)
+    return name, value
+
+
+def decode_tree(data, basepath="/"):
+    magic, format_version, parser_version, string_count, op_count = HEADER.unpack_from(data)
+    if magic != MAGIC or format_version != AST_FORMAT_VERSION or parser_version != PARSER_VERSION:
+        raise ValueError("incompatible AST cache entry")
+    offset = HEADER.size
+    lengths = array('I')
+    lengths.frombytes(data[offset:offset + string_count * lengths.itemsize])
+    offset += string_count * lengths.itemsize
+    ops = array('I')
+    ops.frombytes(data[offset:offset + op_count * ops.itemsize])
+    offset += op_count * ops.itemsize
+
+    strings = [None]
+    for length in lengths:
+        strings.append(data[offset:offset + length].decode())
+        offset += length
+
+    root = None
+    open_parents = []
+    # Nodes with the same interned attributes share one props tuple.
+    shared_props = {}
+    position = 0
+    while position < op_count:
+        kind, tag, third, prop_count = ops[position:position + 4]
+        position += 4
+        props = None
+        if prop_count:
+            indexes = tuple(ops[position:position + 2 * prop_count])
+            position += 2 * prop_count
+            props = shared_props.get(indexes)
+            if props is None:
+                props = shared_props[indexes] = tuple(
+                    _decode_prop(strings[indexes[i]], strings[indexes[i + 1]], basepath)
+                    for i in range(0, len(indexes), 2)
+                )
+
+        if kind == PARENT:
+            node = ParentNode(strings[tag], [], props)
+        else:
+            node = LeafNode(strings[tag], strings[third], props)
+
+        if open_parents:
+            open_parents[-1][0].append(node)
+            open_parents[-1][1] -= 1
+        else:
+            root = node
+        if kind == PARENT and third:
+            open_parents.append([node.children, third])
+        while open_parents and open_parents[-1][1] == 0:
+            open_parents.pop()
+    return root
+
+
+class AstCache:
+    def __init__(self, directory):
+        self.directory = directory
+        # Folded into every key; set it when inline rendering depends on build inputs.
+        self.salt = ""
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".ast")
+
+    def get(self, key, basepath="/"):
+        try:
+            with open(self._path(key), 'rb') as f:
+                node = decode_tree(f.read(), basepath)
+        except (FileNotFoundError, ValueError, struct.error):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return node
+
+    def put(self, key, node):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = encode_tree(node)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return data
+
+    def report(self):
+        return f"AST cache: {self.hits} hits, {self.misses} misses"
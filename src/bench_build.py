@@ -0,0 +1,149 @@
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+
+from block_markdown import block_to_block_type, markdown_to_blocks, markdown_to_html_node
+from inline_markdown import text_to_textnodes
+from page_generator import generate_pages_recursive
+from synthetic_corpus import write_corpus
+
+TEMPLATE = "<!doctype html><title>{{ Title }}</title><article>{{ Content }}</article>"
+
+
+def best_of(fn, repeat):
+    timings = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - started)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return min(timings)
+
+
+def run_benchmarks(args):
+    with tempfile.TemporaryDirectory() as root:
+        content = os.path.join(root, "content")
+        paths = write_corpus(
+            content,
+            pages=args.pages,
+            seed=args.seed,
+            blocks=args.blocks,
+            link_density=args.link_density,
+            depth=args.depth,
+        )
+        documents = []
+        for path in paths:
+            with open(path) as f:
+                documents.append(f.read())
+        blocks = [block for doc in documents for block in markdown_to_blocks(doc)]
+        paragraphs = [
+            " ".join(block.split("\n")) for block in blocks if not block.startswith(("#", "```"))
+        ]
+        nodes = [markdown_to_html_node(doc) for doc in documents]
+
+        template_path = os.path.join(root, "template.html")
+        with open(template_path, 'w') as f:
+            f.write(TEMPLATE)
+        docs = os.path.join(root, "docs")
+
+        def end_to_end():
+            with open(os.devnull, 'w') as devnull:
+                stdout, sys.stdout = sys.stdout, devnull
+                try:
+                    generate_pages_recursive(content, template_path, docs)
+                finally:
+                    sys.stdout = stdout
+
+        stages = {
+            "markdown_to_blocks": lambda: [markdown_to_blocks(doc) for doc in documents],
+            "block_to_block_type": lambda: [block_to_block_type(block) for block in blocks],
+            "text_to_textnodes": lambda: [text_to_textnodes(text) for text in paragraphs],
+            "markdown_to_html_node": lambda: [markdown_to_html_node(doc) for doc in documents],
+            "to_html": lambda: [node.to_html() for node in nodes],
+            "generate_pages_recursive": end_to_end,
+        }
+        results = {}
+        for name, fn in stages.items():
+            if args.stage and name not in args.stage:
+                continue
+            results[name] = best_of(fn, args.repeat)
+            print(f"  {name:<26} {results[name] * 1000:10.2f} ms")
+
+    return {
+        "corpus": {
+            "pages": args.pages,
+            "seed": args.seed,
+            "blocks": args.blocks,
+            "link_density": args.link_density,
+            "depth": args.depth,
+        },
+        "seconds": results,
+    }
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    if baseline.get("corpus") != results["corpus"]:
+        print("warning: baseline was recorded with a different corpus")
+    for name, seconds in results["seconds"].items():
+        before = baseline["seconds"].get(name)
+        if not before:
+            continue
+        change = (seconds - before) / before
+        flag = "REGRESSION" if change > threshold else ""
+        print(f"  {name:<26} {before * 1000:10.2f} -> {seconds * 1000:10.2f} ms  {change:+7.1%} {flag}")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark each build stage on a synthetic corpus.")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--blocks", type=int, default=40, help="blocks per page")
+    parser.add_argument("--link-density", type=float, default=0.05)
+    parser.add_argument("--depth", type=int, default=2, help="maximum directory nesting")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--stage", action="append", help="only run the named stage")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="relative slowdown that counts as a regression",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    print(f"Benchmarking {args.pages} pages x {args.blocks} blocks (seed {args.seed})")
+    results = run_benchmarks(args)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote results to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"Comparing against {args.compare}")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"Regressions: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+import re
+import sys
+import timeit
+
+from inline_markdown import text_to_textnodes
+from textnode import TextNode, TextType
+
+
+def legacy_split_nodes_delimiter(old_nodes, delimiter, text_type):
+    new_nodes = []
+    for old_node in old_nodes:
+        if old_node.text_type != TextType.TEXT:
+            new_nodes.append(old_node)
+            continue
+        sections = old_node.text.split(delimiter)
+        if len(sections) % 2 == 0:
+            raise ValueError("invalid markdown, formatted section not closed")
+        for i, section in enumerate(sections):
+            if section:
+                new_nodes.append(TextNode(section, TextType.TEXT if i % 2 == 0 else text_type))
+    return new_nodes
+
+
+def legacy_split_nodes_pattern(old_nodes, pattern, fmt, text_type):
+    new_nodes = []
+    for old_node in old_nodes:
+        if old_node.text_type != TextType.TEXT:
+            new_nodes.append(old_node)
+            continue
+        current_text = old_node.text
+        for text, url in re.findall(pattern, current_text):
+            before, current_text = current_text.split(fmt.format(text, url), 1)
+            if before:
+                new_nodes.append(TextNode(before, TextType.TEXT))
+            new_nodes.append(TextNode(text, text_type, url))
+        if current_text:
+            new_nodes.append(TextNode(current_text, TextType.TEXT))
+    return new_nodes
+
+
+def legacy_text_to_textnodes(text):
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = legacy_split_nodes_pattern(
+        nodes, r"!\[([^\[\]]*)\]\(([^\(\)]*)\)", "![{}]({})", TextType.IMAGE
+    )
+    nodes = legacy_split_nodes_pattern(
+        nodes, r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)", "[{}]({})", TextType.LINK
+    )
+    nodes = legacy_split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = legacy_split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    nodes = legacy_split_nodes_delimiter(nodes, "`", TextType.CODE)
+    return nodes
+
+
+def link_dense_paragraph(links):
+    parts = []
+    for i in range(links):
+        parts.append(f"see [page {i}](/docs/page-{i}) and **note {i}** with `code{i}`, ")
+    return "".join(parts)
+
+
+def main():
+    links = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    text = link_dense_paragraph(links)
+    if legacy_text_to_textnodes(text) != text_to_textnodes(text):
+        raise SystemExit("tokenizer output differs from the legacy chained passes")
+
+    runs = 20
+    legacy = min(timeit.repeat(lambda: legacy_text_to_textnodes(text), number=runs, repeat=3))
+    single = min(timeit.repeat(lambda: text_to_textnodes(text), number=runs, repeat=3))
+    print(f"{links} links, {len(text)} chars, {runs} runs")
+    print(f"  chained passes:   {legacy / runs * 1000:8.2f} ms")
+    print(f"  single pass:      {single / runs * 1000:8.2f} ms")
+    print(f"  speedup:          {legacy / single:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import sys
+import tracemalloc
+
+from htmlnode import LeafNode
+from textnode import TextNode, TextType
+
+
+class DictTextNode:
+    def __init__(self, text, text_type, url=None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+
+class DictLeafNode:
+    def __init__(self, tag, value, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = None
+        self.props = props
+
+
+def bytes_per_node(factory, count):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    nodes = [factory(i) for i in range(count)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    # Exclude the list holding the nodes.
+    allocated -= sys.getsizeof(nodes)
+    return allocated / count
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    text = "shared token text"
+    cases = [
+        ("TextNode", lambda i: DictTextNode(text, TextType.TEXT), lambda i: TextNode(text, TextType.TEXT)),
+        ("LeafNode", lambda i: DictLeafNode("b", text), lambda i: LeafNode("b", text)),
+        (
+            "LeafNode + props",
+            lambda i: DictLeafNode("a", text, {"href": "/"}),
+            lambda i: LeafNode("a", text, (("href", "/"),)),
+        ),
+    ]
+    print(f"{count} nodes per case, bytes per node")
+    for name, before, after in cases:
+        old = bytes_per_node(before, count)
+        new = bytes_per_node(after, count)
+        print(f"  {name:<18} __dict__: {old:7.1f}   __slots__: {new:7.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,13 @@
+import hashlib
+import io
 from enum import Enum
+from functools import lru_cache
+import inline_markdown
+import textnode
 from htmlnode import ParentNode, LeafNode
 from inline_markdown import text_to_textnodes
+from profiling import profiler
+from render_cache import block_key
 from textnode import text_node_to_html_node
 
 
@@ -13,130 +20,276 @@ class BlockType(Enum):
     ORDERED_LIST = "ordered_list"
 
 
+HEADING_PREFIXES = ("# ", "## ", "### ", "#### ", "##### ", "###### ")
+CODE_FENCE = "```"
+
+
+def _finish_block(block_lines):
+    block_lines[-1] = block_lines[-1].rstrip()
+    return lines_to_block_type(block_lines), block_lines
+
+
+def scan_lines(lines, fences=True):
+    block_lines = []
+    in_fence = False
+    for line in lines:
+        line = line.rstrip("\n")
+        if in_fence:
+            block_lines.append(line)
+            if line.rstrip().endswith(CODE_FENCE):
+                block_lines[-1] = line.rstrip()
+                yield BlockType.CODE, block_lines
+                block_lines = []
+                in_fence = False
+            continue
+
+        if not line.strip():
+            if block_lines:
+                yield _finish_block(block_lines)
+                block_lines = []
+            continue
+
+        if not block_lines:
+            line = line.lstrip()
+            if fences and line.startswith(CODE_FENCE):
+                opener = line.rstrip()
+                if len(opener) >= 2 * len(CODE_FENCE) and opener.endswith(CODE_FENCE):
+                    yield BlockType.CODE, [opener]
+                    continue
+                in_fence = True
+        block_lines.append(line)
+
+    if in_fence:
+        # The fence never closed, so none of the remaining lines can be code.
+        yield from scan_lines(block_lines, fences=False)
+    elif block_lines:
+        yield _finish_block(block_lines)
+
+
+def scan_blocks(markdown):
+    return scan_lines(io.StringIO(markdown))
+
+
 def markdown_to_blocks(markdown):
-    blocks = markdown.split('\n\n')
-    filtered_blocks = []
-    for block in blocks:
-        stripped_block = block.strip()
-        if stripped_block:
-            filtered_blocks.append(stripped_block)
-    return filtered_blocks
+    return ["\n".join(lines) for _, lines in scan_blocks(markdown)]
 
 
-def block_to_block_type(block):
-    lines = block.split("\n")
-
-    if (
-        block.startswith("# ")
-        or block.startswith("## ")
-        or block.startswith("### ")
-        or block.startswith("#### ")
-        or block.startswith("##### ")
-        or block.startswith("###### ")
-    ):
+# Custom (detector, block_type) pairs, tried before the built-in rules.
+BLOCK_DETECTORS = []
+
+
+def lines_to_block_type(lines):
+    for detector, block_type in BLOCK_DETECTORS:
+        if detector(lines):
+            return block_type
+
+    first = lines[0]
+    if first.startswith(HEADING_PREFIXES):
         return BlockType.HEADING
 
-    if block.startswith("```") and block.endswith("```"):
+    if first.startswith(CODE_FENCE) and lines[-1].endswith(CODE_FENCE):
         return BlockType.CODE
 
-    if all(line.startswith(">") for line in lines):
-        return BlockType.QUOTE
-
+    is_quote = True
     is_ulist = True
-    for line in lines:
-        if not (line.startswith("* ") or line.startswith("- ")):
+    is_olist = first.startswith("1. ")
+    for i, line in enumerate(lines):
+        if is_quote and not line.startswith(">"):
+            is_quote = False
+        if is_ulist and not line.startswith(("* ", "- ")):
             is_ulist = False
-            break
+        if is_olist and not line.startswith(f"{i + 1}. "):
+            is_olist = False
+        if not (is_quote or is_ulist or is_olist):
+            return BlockType.PARAGRAPH
+
+    if is_quote:
+        return BlockType.QUOTE
     if is_ulist:
         return BlockType.UNORDERED_LIST
+    return BlockType.ORDERED_LIST
 
-    if lines[0].startswith("1. "):
-        is_olist = True
-        for i, line in enumerate(lines):
-            if not line.startswith(f"{i + 1}. "):
-                is_olist = False
-                break
-        if is_olist:
-            return BlockType.ORDERED_LIST
 
-    return BlockType.PARAGRAPH
+def block_to_block_type(block):
+    return lines_to_block_type(block.split("\n"))
 
 
-def text_to_children(text):
-    text_nodes = text_to_textnodes(text)
-    children = [text_node_to_html_node(node) for node in text_nodes]
+def text_to_children(text, basepath="/"):
+    with profiler.phase("text_to_textnodes"):
+        text_nodes = text_to_textnodes(text)
+    children = [text_node_to_html_node(node, basepath) for node in text_nodes]
     return children
 
 
-def paragraph_to_html_node(block):
-    content = " ".join(block.split('\n'))
-    children = text_to_children(content)
-    return ParentNode("p", children)
+def paragraph_texts(lines):
+    return [" ".join(lines)]
 
 
-def heading_to_html_node(block):
+def heading_level(lines):
+    first = lines[0]
     level = 0
-    while level < len(block) and block[level] == '#':
+    while level < len(first) and first[level] == '#':
         level += 1
-    text = block[level:].lstrip()
-    children = text_to_children(text)
-    return ParentNode(f"h{level}", children)
+    return level
+
+
+def heading_texts(lines):
+    return ["\n".join(lines)[heading_level(lines):].lstrip()]
+
+
+def quote_texts(lines):
+    return [" ".join(line.lstrip('> ').strip() for line in lines)]
+
 
+def ulist_texts(lines):
+    return [item[2:] for item in lines]
 
-def code_to_html_node(block):
-    text = block[3:-3]
+
+def olist_texts(lines):
+    return [item.split(". ", 1)[1] for item in lines]
+
+
+def paragraph_to_html_node(lines, basepath="/"):
+    children = text_to_children(paragraph_texts(lines)[0], basepath)
+    return ParentNode("p", children)
+
+
+def heading_to_html_node(lines, basepath="/"):
+    children = text_to_children(heading_texts(lines)[0], basepath)
+    return ParentNode(f"h{heading_level(lines)}", children)
+
+
+def code_to_html_node(lines, basepath="/"):
+    text = "\n".join(lines)[3:-3]
     if text.startswith('\n'):
         text = text[1:]
     code_child = LeafNode("code", text)
     return ParentNode("pre", [code_child])
 
 
-def quote_to_html_node(block):
-    lines = block.split('\n')
-    cleaned_lines = [line.lstrip('> ').strip() for line in lines]
-    content = " ".join(cleaned_lines)
-    children = text_to_children(content)
+def quote_to_html_node(lines, basepath="/"):
+    children = text_to_children(quote_texts(lines)[0], basepath)
     return ParentNode("blockquote", children)
 
 
-def ulist_to_html_node(block):
-    items = block.split('\n')
+def ulist_to_html_node(lines, basepath="/"):
     html_items = []
-    for item in items:
-        text = item[2:]
-        children = text_to_children(text)
+    for text in ulist_texts(lines):
+        children = text_to_children(text, basepath)
         html_items.append(ParentNode("li", children))
     return ParentNode("ul", html_items)
 
 
-def olist_to_html_node(block):
-    items = block.split('\n')
+def olist_to_html_node(lines, basepath="/"):
     html_items = []
-    for item in items:
-        text = item.split(". ", 1)[1]
-        children = text_to_children(text)
+    for text in olist_texts(lines):
+        children = text_to_children(text, basepath)
         html_items.append(ParentNode("li", children))
     return ParentNode("ol", html_items)
 
 
-def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
-    children = []
-    for block in blocks:
-        block_type = block_to_block_type(block)
-        if block_type == BlockType.PARAGRAPH:
-            children.append(paragraph_to_html_node(block))
-        elif block_type == BlockType.HEADING:
-            children.append(heading_to_html_node(block))
-        elif block_type == BlockType.CODE:
-            children.append(code_to_html_node(block))
-        elif block_type == BlockType.QUOTE:
-            children.append(quote_to_html_node(block))
-        elif block_type == BlockType.UNORDERED_LIST:
-            children.append(ulist_to_html_node(block))
-        elif block_type == BlockType.ORDERED_LIST:
-            children.append(olist_to_html_node(block))
-        else:
-            raise ValueError(f"Unknown block type: {block_type}")
+BLOCK_BUILDERS = {
+    BlockType.PARAGRAPH: paragraph_to_html_node,
+    BlockType.HEADING: heading_to_html_node,
+    BlockType.CODE: code_to_html_node,
+    BlockType.QUOTE: quote_to_html_node,
+    BlockType.UNORDERED_LIST: ulist_to_html_node,
+    BlockType.ORDERED_LIST: olist_to_html_node,
+}
+
+# The inline markdown each block type renders; code blocks have none.
+BLOCK_INLINE_TEXTS = {
+    BlockType.PARAGRAPH: paragraph_texts,
+    BlockType.HEADING: heading_texts,
+    BlockType.QUOTE: quote_texts,
+    BlockType.UNORDERED_LIST: ulist_texts,
+    BlockType.ORDERED_LIST: olist_texts,
+}
+
+
+def register_block_type(block_type, builder, detector=None, inline_texts=None):
+    BLOCK_BUILDERS[block_type] = builder
+    if detector is not None:
+        BLOCK_DETECTORS.append((detector, block_type))
+    if inline_texts is not None:
+        BLOCK_INLINE_TEXTS[block_type] = inline_texts
+
+
+def block_text_nodes(block_type, lines):
+    texts = BLOCK_INLINE_TEXTS.get(block_type)
+    if texts is None:
+        return []
+    nodes = []
+    for text in texts(lines):
+        nodes.extend(text_to_textnodes(text))
+    return nodes
+
 
+def observe_blocks(blocks, observe):
+    # Observers see the TextNodes each block renders, never raw markdown.
+    for block_type, lines in blocks:
+        observe(block_type, block_text_nodes(block_type, lines))
+
+
+def block_to_html_node(block_type, lines, basepath="/"):
+    builder = BLOCK_BUILDERS.get(block_type)
+    if builder is None:
+        raise ValueError(f"Unknown block type: {block_type}")
+    return builder(lines, basepath)
+
+
+def _callable_fingerprint(function):
+    name = f"{getattr(function, '__module__', '')}.{getattr(function, '__qualname__', repr(function))}"
+    code = getattr(function, "__code__", None)
+    if code is None:
+        return name
+    return f"{name}:{hashlib.sha256(code.co_code).hexdigest()[:16]}"
+
+
+@lru_cache(maxsize=8)
+def _registry_fingerprint(delimiters, detectors, block_builders, text_builders):
+    parts = [f"{delimiter}={getattr(text_type, 'value', text_type)}" for delimiter, text_type in delimiters]
+    for detector, block_type in detectors:
+        parts.append(f"{getattr(block_type, 'value', block_type)}?{_callable_fingerprint(detector)}")
+    for kind, builder in block_builders + text_builders:
+        parts.append(f"{getattr(kind, 'value', kind)}:{_callable_fingerprint(builder)}")
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+
+def rendering_fingerprint():
+    # Registered builders and delimiters shape the output, so caches key on them.
+    return _registry_fingerprint(
+        inline_markdown.INLINE_DELIMITERS,
+        tuple(BLOCK_DETECTORS),
+        tuple(BLOCK_BUILDERS.items()),
+        tuple(textnode.TEXT_NODE_BUILDERS.items()),
+    )
+
+
+def iter_block_nodes(blocks, basepath="/", cache=None, observe=None):
+    if cache is not None:
+        salt = f"{rendering_fingerprint()}:{cache.salt}"
+    for block_type, lines in blocks:
+        if observe is not None:
+            observe(block_type, block_text_nodes(block_type, lines))
+        if cache is None:
+            yield block_to_html_node(block_type, lines, basepath)
+            continue
+        key = block_key(block_type, lines, basepath, salt)
+        html = cache.get(key)
+        if html is None:
+            html = block_to_html_node(block_type, lines, basepath).to_html()
+            cache.put(key, html)
+        yield LeafNode(None, html)
+
+
+def markdown_to_html_node(markdown, basepath="/", cache=None, observe=None):
+    children = list(iter_block_nodes(scan_blocks(markdown), basepath, cache, observe))
     return ParentNode("div", children)
+
+
+def iter_markdown_html(lines, basepath="/", cache=None, observe=None):
+    yield "<div>"
+    for node in iter_block_nodes(scan_lines(lines), basepath, cache, observe):
+        yield from node.iter_html()
+    yield "</div>"
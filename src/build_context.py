@@ -0,0 +1,85 @@
+from contextlib import contextmanager
+
+from textnode import ACTIVE_IMAGES
+
+# Sources larger than this are parsed and written block by block.
+STREAM_THRESHOLD = 16 * 1024 * 1024
+
+
+class BuildContext:
+    def __init__(self, render_cache=None, ast_cache=None, stream_threshold=STREAM_THRESHOLD, io_threads=0, link_index=None, search_index=None, images=None, assets=None, compressor=None):
+        self.render_cache = render_cache
+        self.ast_cache = ast_cache
+        self.images = images
+        self.assets = assets
+        self.compressor = compressor
+        self.link_index = link_index
+        self.search_index = search_index
+        self.stream_threshold = stream_threshold
+        self.io_threads = io_threads
+        self.written = 0
+        self.unchanged = 0
+
+    @contextmanager
+    def rendering(self):
+        token = ACTIVE_IMAGES.set(self.images)
+        try:
+            yield
+        finally:
+            ACTIVE_IMAGES.reset(token)
+
+    def record_write(self, changed):
+        if changed:
+            self.written += 1
+        else:
+            self.unchanged += 1
+
+    def _counters(self):
+        return {
+            name: cache
+            for name, cache in (("render_cache", self.render_cache), ("ast_cache", self.ast_cache))
+            if cache is not None
+        }
+
+    def _indexes(self):
+        return {
+            name: index
+            for name, index in (("link_index", self.link_index), ("search_index", self.search_index))
+            if index is not None
+        }
+
+    def page_indexes(self):
+        return list(self._indexes().values())
+
+    def take_stats(self):
+        stats = {"output": (self.written, self.unchanged), "caches": {}, "indexes": {}}
+        self.written = self.unchanged = 0
+        for name, cache in self._counters().items():
+            stats["caches"][name] = (cache.hits, cache.misses)
+            cache.hits = cache.misses = 0
+        for name, index in self._indexes().items():
+            stats["indexes"][name] = index.take()
+        if self.compressor is not None:
+            stats["compression"] = self.compressor.take()
+        return stats
+
+    def merge_stats(self, stats):
+        written, unchanged = stats["output"]
+        self.written += written
+        self.unchanged += unchanged
+        counters = self._counters()
+        for name, (hits, misses) in stats["caches"].items():
+            counters[name].hits += hits
+            counters[name].misses += misses
+        indexes = self._indexes()
+        for name, pages in stats["indexes"].items():
+            indexes[name].merge(pages)
+        if "compression" in stats:
+            self.compressor.merge(stats["compression"])
+
+    def reports(self):
+        reports = [cache.report() for cache in self._counters().values()]
+        reports.append(f"Pages: {self.written} written, {self.unchanged} unchanged")
+        if self.compressor is not None:
+            reports.append(self.compressor.report())
+        return reports
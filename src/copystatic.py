@@ -1,16 +1,190 @@
+import hashlib
+import json
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
-def copy_files_recursive(source_dir_path, dest_dir_path):
-    if not os.path.exists(dest_dir_path):
-        os.mkdir(dest_dir_path)
+from manifest import file_hash, stat_key
+from profiling import profiler
+from template import register_asset_urls
+from tree_walker import STATIC, make_output_dirs, walk_tree
 
-    for filename in os.listdir(source_dir_path):
-        from_path = os.path.join(source_dir_path, filename)
-        dest_path = os.path.join(dest_dir_path, filename)
+
+def copy_files_recursive(source_dir_path, dest_dir_path, manifest=None):
+    entries = walk_tree(source_dir_path, dest_dir_path, STATIC)
+    os.makedirs(dest_dir_path, exist_ok=True)
+    make_output_dirs(entry.dest for entry in entries)
+
+    for entry in entries:
+        if manifest is not None:
+            key = stat_key(entry.size, entry.mtime_ns)
+            if manifest.is_fresh("static", entry.source, key, entry.dest):
+                manifest.skip("static", entry.source)
+                continue
+            manifest.record("static", entry.source, key, entry.dest)
+        print(f" * {entry.source} -> {entry.dest}")
+        with profiler.phase("copy_static"):
+            unlink_output(entry.dest)
+            shutil.copy(entry.source, entry.dest)
+
+
+def unlink_output(dest_path):
+    # Never write through an old hardlink into a source file.
+    if os.path.lexists(dest_path):
+        os.remove(dest_path)
+
+
+# ioctl request number for FICLONE on Linux (copy-on-write clone of a whole file).
+FICLONE = 0x40049409
+LINK_MODES = ("auto", "copy", "hardlink", "reflink")
+
+
+def is_synced(entry):
+    try:
+        dest_stat = os.stat(entry.dest)
+    except FileNotFoundError:
+        return False
+    return entry.size == dest_stat.st_size and entry.mtime_ns == dest_stat.st_mtime_ns
+
+
+def reflink_file(from_path, dest_path):
+    if fcntl is None:
+        raise OSError("reflinks are not supported on this platform")
+    with open(from_path, 'rb') as source, open(dest_path, 'wb') as dest:
+        fcntl.ioctl(dest.fileno(), FICLONE, source.fileno())
+    shutil.copystat(from_path, dest_path)
+
+
+def link_file(from_path, dest_path, mode):
+    unlink_output(dest_path)
+    if mode in ("auto", "reflink"):
+        try:
+            reflink_file(from_path, dest_path)
+            return "reflinked"
+        except OSError:
+            if os.path.exists(dest_path):
+                os.remove(dest_path)
+            if mode == "reflink":
+                raise
+    os.link(from_path, dest_path)
+    return "hardlinked"
+
+
+def same_filesystem(source_dir_path, dest_dir_path):
+    return os.stat(source_dir_path).st_dev == os.stat(dest_dir_path).st_dev
+
+
+def sync_files_recursive(source_dir_path, dest_dir_path, manifest=None, mode="auto", threads=8):
+    if mode not in LINK_MODES:
+        raise ValueError(f"invalid link mode: {mode}")
+    os.makedirs(dest_dir_path, exist_ok=True)
+    use_links = mode in ("hardlink", "reflink") or (
+        mode == "auto" and same_filesystem(source_dir_path, dest_dir_path)
+    )
+
+    stats = {"skipped": 0, "copied": 0, "hardlinked": 0, "reflinked": 0}
+    to_copy = []
+    entries = walk_tree(source_dir_path, dest_dir_path, STATIC)
+    make_output_dirs(entry.dest for entry in entries)
+    for entry in entries:
+        from_path, dest_path = entry.source, entry.dest
+        if manifest is not None:
+            manifest.record("static", from_path, stat_key(entry.size, entry.mtime_ns), dest_path)
+        if is_synced(entry):
+            stats["skipped"] += 1
+            continue
         print(f" * {from_path} -> {dest_path}")
-        if os.path.isfile(from_path):
-            shutil.copy(from_path, dest_path)
+        if use_links:
+            try:
+                with profiler.phase("copy_static"):
+                    stats[link_file(from_path, dest_path, mode)] += 1
+                continue
+            except OSError:
+                if mode != "auto":
+                    raise
+        to_copy.append((from_path, dest_path))
+
+    with profiler.phase("copy_static_threads"):
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            for _ in executor.map(_replace_with_copy, to_copy):
+                stats["copied"] += 1
+    return stats
+
+
+def _replace_with_copy(paths):
+    from_path, dest_path = paths
+    unlink_output(dest_path)
+    shutil.copy2(from_path, dest_path)
+
+
+ASSET_MANIFEST_VERSION = 1
+FINGERPRINT_LENGTH = 10
+# Fingerprinted names change whenever their content does, so they never go stale.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def fingerprinted_name(path, digest):
+    stem, suffix = os.path.splitext(path)
+    return f"{stem}.{digest[:FINGERPRINT_LENGTH]}{suffix}"
+
+
+class AssetManifest:
+    def __init__(self, urls=None):
+        # site url -> fingerprinted site url
+        self.urls = urls or {}
+        self.hashed = 0
+        self.reused = 0
+        self.written = 0
+
+    def fingerprint(self):
+        return hashlib.sha256(json.dumps(self.urls, sort_keys=True).encode()).hexdigest()
+
+    def install(self):
+        register_asset_urls(self.urls)
+
+    def write(self, path):
+        data = {
+            "version": ASSET_MANIFEST_VERSION,
+            "cache_control": IMMUTABLE_CACHE_CONTROL,
+            "assets": self.urls,
+        }
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+
+    def report(self):
+        return (
+            f"Assets: {len(self.urls)} fingerprinted, {self.hashed} hashed, "
+            f"{self.reused} hashes reused, {self.written} copies written"
+        )
+
+
+def fingerprint_static(source_dir_path, dest_dir_path, manifest=None):
+    assets = AssetManifest()
+    for entry in walk_tree(source_dir_path, dest_dir_path, STATIC):
+        key = stat_key(entry.size, entry.mtime_ns)
+        previous = manifest.previous_entry("static", entry.source) if manifest is not None else None
+        if previous is not None and previous["key"] == key and "hash" in previous:
+            digest = previous["hash"]
+            assets.reused += 1
         else:
-            copy_files_recursive(from_path, dest_path)
+            digest = file_hash(entry.source)
+            assets.hashed += 1
+        if manifest is not None:
+            manifest.attach("static", entry.source, hash=digest)
+
+        dest_path = fingerprinted_name(entry.dest, digest)
+        # The name is derived from the content, so an existing copy is already correct.
+        if not os.path.exists(dest_path):
+            shutil.copy2(entry.source, dest_path)
+            assets.written += 1
+        if manifest is not None:
+            manifest.record("static", f"{entry.source}@{digest[:FINGERPRINT_LENGTH]}", key, dest_path)
+
+        url = "/" + os.path.relpath(entry.source, source_dir_path).replace(os.sep, "/")
+        assets.urls[url] = fingerprinted_name(url, digest)
+    return assets
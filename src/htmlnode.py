@@ -1,6 +1,8 @@
 
 
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
@@ -10,12 +12,20 @@ class HTMLNode:
     def to_html(self):
         raise NotImplementedError
 
+    def iter_html(self):
+        raise NotImplementedError
+
+    def write_html(self, fp):
+        for chunk in self.iter_html():
+            fp.write(chunk)
+
     def props_to_html(self):
         if self.props is None:
             return ""
+        props = self.props.items() if isinstance(self.props, dict) else self.props
         props_html = ""
-        for prop in self.props:
-            props_html += f' {prop}="{self.props[prop]}"'
+        for prop, value in props:
+            props_html += f' {prop}="{value}"'
         return props_html
 
     def __repr__(self):
@@ -23,6 +33,8 @@ class HTMLNode:
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         super().__init__(tag, value, None, props)
 
@@ -33,22 +45,30 @@ class LeafNode(HTMLNode):
             return self.value
         return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
 
+    def iter_html(self):
+        yield self.to_html()
+
     def __repr__(self):
         return f"LeafNode({self.tag}, {self.value}, {self.props})"
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag, None, children, props)
 
     def to_html(self):
+        return "".join(self.iter_html())
+
+    def iter_html(self):
         if self.tag is None:
             raise ValueError("invalid HTML: no tag")
         if self.children is None:
             raise ValueError("invalid HTML: no children")
-        children_html = ""
+        yield f"<{self.tag}{self.props_to_html()}>"
         for child in self.children:
-            children_html += child.to_html()
-        return f"<{self.tag}{self.props_to_html()}>{children_html}</{self.tag}>"
+            yield from child.iter_html()
+        yield f"</{self.tag}>"
 
     def __repr__(self):
         return f"ParentNode({self.tag}, children: {self.children}, {self.props})"
@@ -0,0 +1,222 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+from htmlnode import LeafNode
+from manifest import file_hash
+from png_codec import CHANNELS, read_png, read_png_size, resize_rows, write_png
+from template import rewrite_url
+from tree_walker import STATIC, walk_tree
+
+# Bump whenever resizing or encoding changes so cached derivatives are rebuilt.
+IMAGE_CACHE_VERSION = 1
+DEFAULT_WIDTHS = (480, 960, 1440)
+IMAGE_BACKENDS = ("auto", "pillow", "python")
+
+
+class PythonBackend:
+    name = "python"
+    suffixes = (".png",)
+
+    def size(self, path):
+        return read_png_size(path)
+
+    def resize(self, source, targets):
+        try:
+            width, height, color_type, rows = read_png(source)
+        except ValueError:
+            # Palette, 16-bit and interlaced PNGs are published as-is.
+            return []
+        results = []
+        for new_width, dest in targets:
+            new_height = max(1, round(height * new_width / width))
+            resized = resize_rows(rows, width, height, CHANNELS[color_type], new_width, new_height)
+            write_png(dest, new_width, new_height, color_type, resized)
+            results.append((new_width, new_height))
+        return results
+
+
+class PillowBackend:
+    name = "pillow"
+    suffixes = (".png", ".jpg", ".jpeg", ".webp")
+
+    def size(self, path):
+        with Image.open(path) as image:
+            return image.size
+
+    def resize(self, source, targets):
+        results = []
+        with Image.open(source) as image:
+            width, height = image.size
+            for new_width, dest in targets:
+                new_height = max(1, round(height * new_width / width))
+                resized = image.resize((new_width, new_height), Image.LANCZOS)
+                resized.save(dest, format=image.format, optimize=True)
+                results.append((new_width, new_height))
+        return results
+
+
+def get_backend(name="auto"):
+    if name not in IMAGE_BACKENDS:
+        raise ValueError(f"invalid image backend: {name}")
+    if name == "pillow" and Image is None:
+        raise ValueError("the pillow image backend needs the Pillow package")
+    if name == "python" or Image is None:
+        return PythonBackend()
+    return PillowBackend()
+
+
+def variant_name(path, width):
+    stem, suffix = os.path.splitext(path)
+    return f"{stem}-{width}w{suffix}"
+
+
+def _build_variants(source, key, widths, cache_dir, backend_name):
+    backend = get_backend(backend_name)
+    width, height = backend.size(source)
+    suffix = os.path.splitext(source)[1]
+    targets = [
+        (new_width, os.path.join(cache_dir, f"{key}-{new_width}w{suffix}"))
+        for new_width in widths
+        if new_width < width
+    ]
+    sizes = backend.resize(source, targets)
+    variants = [
+        {"width": new_width, "height": new_height, "file": os.path.basename(dest)}
+        for (new_width, new_height), (_, dest) in zip(sizes, targets)
+    ]
+    meta = {"width": width, "height": height, "variants": variants}
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    with os.fdopen(fd, 'w') as f:
+        json.dump(meta, f)
+    # The metadata is written last so a cache hit always has its derivatives.
+    os.replace(tmp_path, os.path.join(cache_dir, key + ".json"))
+    return meta
+
+
+def _place(from_path, dest_path):
+    try:
+        dest_stat = os.stat(dest_path)
+    except FileNotFoundError:
+        dest_stat = None
+    source_stat = os.stat(from_path)
+    if dest_stat is not None and (
+        source_stat.st_size == dest_stat.st_size and source_stat.st_mtime_ns == dest_stat.st_mtime_ns
+    ):
+        return False
+    shutil.copy2(from_path, dest_path)
+    return True
+
+
+class ImageIndex:
+    def __init__(self, entries=None):
+        # site url -> {"width", "height", "srcset": [(url, width), ...]}
+        self.entries = entries or {}
+        # (url, basepath) -> shared width, height and srcset props
+        self.props = {}
+
+    def fingerprint(self):
+        return hashlib.sha256(json.dumps(self.entries, sort_keys=True).encode()).hexdigest()
+
+    def _size_props(self, url, basepath):
+        props = self.props.get((url, basepath))
+        if props is None:
+            entry = self.entries.get(url)
+            props = ()
+            if entry is not None:
+                props = (("width", str(entry["width"])), ("height", str(entry["height"])))
+                if len(entry["srcset"]) > 1:
+                    srcset = ", ".join(f"{rewrite_url(url, basepath)} {width}w" for url, width in entry["srcset"])
+                    props += (("srcset", srcset),)
+            self.props[(url, basepath)] = props
+        return props
+
+    def image_to_html(self, text_node, basepath):
+        props = (("src", rewrite_url(text_node.url, basepath)), ("alt", text_node.text))
+        return LeafNode("img", "", props + self._size_props(text_node.url, basepath))
+
+
+class ImagePipeline:
+    def __init__(self, cache_dir, widths=DEFAULT_WIDTHS, backend="auto", jobs=None):
+        self.cache_dir = cache_dir
+        self.widths = tuple(sorted(widths))
+        self.backend = get_backend(backend)
+        self.jobs = jobs
+        self.cached = 0
+        self.generated = 0
+        self.placed = 0
+
+    def key(self, source):
+        params = f"{IMAGE_CACHE_VERSION}\0{self.backend.name}\0{self.widths}\0"
+        return hashlib.sha256((params + file_hash(source)).encode()).hexdigest()
+
+    def _cached_meta(self, key):
+        try:
+            with open(os.path.join(self.cache_dir, key + ".json"), 'r') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        for variant in meta["variants"]:
+            if not os.path.exists(os.path.join(self.cache_dir, variant["file"])):
+                return None
+        return meta
+
+    def process(self, static_dir_path, dest_dir_path, manifest=None):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        images = [
+            entry
+            for entry in walk_tree(static_dir_path, dest_dir_path, STATIC)
+            if entry.source.lower().endswith(self.backend.suffixes)
+        ]
+        keys = {entry.source: self.key(entry.source) for entry in images}
+        metas = {}
+        missing = []
+        for entry in images:
+            meta = self._cached_meta(keys[entry.source])
+            if meta is None:
+                missing.append(entry.source)
+            else:
+                metas[entry.source] = meta
+                self.cached += 1
+
+        if missing:
+            with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+                futures = {
+                    source: executor.submit(
+                        _build_variants, source, keys[source], self.widths, self.cache_dir, self.backend.name
+                    )
+                    for source in missing
+                }
+                for source, future in futures.items():
+                    print(f" * resizing {source}")
+                    metas[source] = future.result()
+                    self.generated += 1
+
+        index = ImageIndex()
+        for entry in images:
+            meta = metas[entry.source]
+            url = "/" + os.path.relpath(entry.source, static_dir_path).replace(os.sep, "/")
+            srcset = []
+            for variant in meta["variants"]:
+                dest_path = variant_name(entry.dest, variant["width"])
+                self.placed += _place(os.path.join(self.cache_dir, variant["file"]), dest_path)
+                if manifest is not None:
+                    manifest.record("variants", dest_path, keys[entry.source], dest_path)
+                srcset.append((variant_name(url, variant["width"]), variant["width"]))
+            srcset.append((url, meta["width"]))
+            index.entries[url] = {"width": meta["width"], "height": meta["height"], "srcset": srcset}
+        return index
+
+    def report(self):
+        return (
+            f"Images: {self.generated} resized, {self.cached} from cache, "
+            f"{self.placed} variants written ({self.backend.name} backend)"
+        )
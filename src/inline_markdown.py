@@ -1,118 +1,133 @@
 import re
+from functools import lru_cache
 from textnode import TextNode, TextType
 
-
-def split_nodes_delimiter(old_nodes, delimiter, text_type):
-    new_nodes = []
-    for old_node in old_nodes:
-        if old_node.text_type != TextType.TEXT:
-            new_nodes.append(old_node)
-            continue
-        split_nodes = []
-        sections = old_node.text.split(delimiter)
-        if len(sections) % 2 == 0:
-            raise ValueError("invalid markdown, formatted section not closed")
-        for i in range(len(sections)):
-            if sections[i] == "":
+IMAGE_PATTERN = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+LINK_PATTERN = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+
+# Longer delimiters come first so "**" wins over "*".
+INLINE_DELIMITERS = (
+    ("**", TextType.BOLD),
+    ("_", TextType.ITALIC),
+    ("*", TextType.ITALIC),
+    ("`", TextType.CODE),
+)
+
+
+@lru_cache(maxsize=None)
+def _special_chars_pattern(delimiters, images, links):
+    chars = {delimiter[0] for delimiter, _ in delimiters}
+    if images:
+        chars.add("!")
+    if links:
+        chars.add("[")
+    if not chars:
+        return None
+    return re.compile("[" + re.escape("".join(sorted(chars))) + "]")
+
+
+def register_inline_delimiter(delimiter, text_type):
+    global INLINE_DELIMITERS
+    delimiters = [entry for entry in INLINE_DELIMITERS if entry[0] != delimiter]
+    delimiters.append((delimiter, text_type))
+    # sorted() is stable, so built-in delimiters keep their relative order.
+    INLINE_DELIMITERS = tuple(sorted(delimiters, key=lambda entry: -len(entry[0])))
+
+
+def tokenize_inline(text, delimiters=None, images=True, links=True):
+    if delimiters is None:
+        delimiters = INLINE_DELIMITERS
+    nodes = []
+    special = _special_chars_pattern(delimiters, images, links)
+    if special is None:
+        if text:
+            nodes.append(TextNode(text, TextType.TEXT))
+        return nodes
+
+    length = len(text)
+    text_start = 0
+    position = 0
+    while True:
+        match = special.search(text, position)
+        if match is None:
+            break
+        position = match.start()
+        char = text[position]
+
+        if char == "!" and images:
+            image = IMAGE_PATTERN.match(text, position)
+            if image:
+                if position > text_start:
+                    nodes.append(TextNode(text[text_start:position], TextType.TEXT))
+                nodes.append(TextNode(image.group(1), TextType.IMAGE, image.group(2)))
+                position = text_start = image.end()
                 continue
-            if i % 2 == 0:
-                split_nodes.append(TextNode(sections[i], TextType.TEXT))
-            else:
-                split_nodes.append(TextNode(sections[i], text_type))
-        new_nodes.extend(split_nodes)
-    return new_nodes
-
-
-def extract_markdown_images(text):
-    pattern = r"!\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    matches = re.findall(pattern, text)
-    return matches
 
+        if char == "[" and links:
+            link = LINK_PATTERN.match(text, position)
+            if link:
+                if position > text_start:
+                    nodes.append(TextNode(text[text_start:position], TextType.TEXT))
+                nodes.append(TextNode(link.group(1), TextType.LINK, link.group(2)))
+                position = text_start = link.end()
+                continue
 
-def extract_markdown_links(text):
-    pattern = r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    matches = re.findall(pattern, text)
-    return matches
+        for delimiter, text_type in delimiters:
+            if not text.startswith(delimiter, position):
+                continue
+            opener_end = position + len(delimiter)
+            # A lone "*" followed by whitespace is arithmetic or a bullet, not emphasis.
+            if delimiter == "*" and (opener_end >= length or text[opener_end].isspace()):
+                continue
+            closer = text.find(delimiter, opener_end)
+            if closer == -1:
+                # "*" was never emphasis before this tokenizer, so an unmatched one stays literal.
+                if delimiter == "*":
+                    continue
+                raise ValueError("invalid markdown, formatted section not closed")
+            if position > text_start:
+                nodes.append(TextNode(text[text_start:position], TextType.TEXT))
+            if closer > opener_end:
+                nodes.append(TextNode(text[opener_end:closer], text_type))
+            position = text_start = closer + len(delimiter)
+            break
+        else:
+            position += 1
+
+    if text_start < length:
+        nodes.append(TextNode(text[text_start:], TextType.TEXT))
+    return nodes
 
 
-def split_nodes_image(old_nodes):
+def _split_text_nodes(old_nodes, delimiters=(), images=False, links=False):
     new_nodes = []
     for old_node in old_nodes:
         if old_node.text_type != TextType.TEXT:
             new_nodes.append(old_node)
             continue
-        original_text = old_node.text
-
-        images = extract_markdown_images(original_text)
-        if not images:
-            if original_text:
-                new_nodes.append(old_node)
-            continue
-
-        current_text = original_text
-        for image_alt, image_url in images:
-            parts = current_text.split(f"![{image_alt}]({image_url})", 1)
-            if len(parts) != 2:
-                if current_text:
-                     new_nodes.append(TextNode(current_text, TextType.TEXT))
-                current_text = ""
-                break
-
-            if parts[0]:
-                new_nodes.append(TextNode(parts[0], TextType.TEXT))
-
-            new_nodes.append(TextNode(image_alt, TextType.IMAGE, image_url))
-            current_text = parts[1]
-
-        if current_text:
-            new_nodes.append(TextNode(current_text, TextType.TEXT))
-
+        new_nodes.extend(tokenize_inline(old_node.text, delimiters, images, links))
     return new_nodes
 
 
-def split_nodes_link(old_nodes):
-    new_nodes = []
-    for old_node in old_nodes:
-        if old_node.text_type != TextType.TEXT:
-            new_nodes.append(old_node)
-            continue
-        original_text = old_node.text
-
-        links = extract_markdown_links(original_text)
-        if not links:
-            if original_text:
-                new_nodes.append(old_node)
-            continue
+def split_nodes_delimiter(old_nodes, delimiter, text_type):
+    return _split_text_nodes(old_nodes, delimiters=((delimiter, text_type),))
 
-        current_text = original_text
-        for link_text, link_url in links:
-            parts = current_text.split(f"[{link_text}]({link_url})", 1)
-            if len(parts) != 2:
-                if current_text:
-                    new_nodes.append(TextNode(current_text, TextType.TEXT))
-                current_text = ""
-                break
 
-            if parts[0]:
-                new_nodes.append(TextNode(parts[0], TextType.TEXT))
+def extract_markdown_images(text):
+    return IMAGE_PATTERN.findall(text)
 
-            new_nodes.append(TextNode(link_text, TextType.LINK, link_url))
-            current_text = parts[1]
 
-        if current_text:
-            new_nodes.append(TextNode(current_text, TextType.TEXT))
+def extract_markdown_links(text):
+    return LINK_PATTERN.findall(text)
 
-    return new_nodes
 
-def text_to_textnodes(text):
+def split_nodes_image(old_nodes):
+    return _split_text_nodes(old_nodes, images=True)
 
-    nodes = [TextNode(text, TextType.TEXT)]
 
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
+def split_nodes_link(old_nodes):
+    return _split_text_nodes(old_nodes, links=True)
 
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
 
-    return nodes
+def text_to_textnodes(text):
+    return tokenize_inline(text)
@@ -0,0 +1,111 @@
+import os
+import posixpath
+from urllib.parse import urlsplit
+
+from metadata import page_url
+from textnode import TextType
+
+
+class LinkReport:
+    def __init__(self, checked, broken, orphans):
+        self.checked = checked
+        self.broken = broken
+        self.orphans = orphans
+
+    def __repr__(self):
+        return f"LinkReport({self.checked}, {self.broken}, {self.orphans})"
+
+    def report(self):
+        lines = [
+            f"Links: {self.checked} internal checked, {len(self.broken)} broken, "
+            f"{len(self.orphans)} orphan pages"
+        ]
+        for source, kind, url in self.broken:
+            lines.append(f" ! {source}: broken {kind} {url}")
+        for source in self.orphans:
+            lines.append(f" ? {source}: no other page links here")
+        return "\n".join(lines)
+
+
+LINK_TYPES = (TextType.LINK, TextType.IMAGE)
+
+
+def node_links(nodes):
+    return [(node.text_type.value, node.url) for node in nodes if node.text_type in LINK_TYPES]
+
+
+def is_internal(url):
+    parts = urlsplit(url)
+    return not (parts.scheme or parts.netloc) and bool(parts.path)
+
+
+def resolve_target(url, from_url):
+    path = urlsplit(url).path
+    if not path.startswith("/"):
+        path = posixpath.join(posixpath.dirname(from_url), path)
+    resolved = posixpath.normpath(path).lstrip("/")
+    return "" if resolved == "." else resolved
+
+
+def output_candidates(target):
+    # /blog/post may be served from blog/post, blog/post.html or blog/post/index.html.
+    if not target:
+        return ("index.html",)
+    target = target.rstrip("/")
+    return (target, f"{target}.html", f"{target}/index.html")
+
+
+class LinkIndex:
+    manifest_field = "links"
+
+    def __init__(self):
+        # source -> (dest, [(kind, url), ...])
+        self.pages = {}
+
+    def start_page(self, source, dest, title):
+        links = []
+        self.pages[source] = (dest, links)
+        return lambda block_type, nodes: links.extend(node_links(nodes))
+
+    def add_page(self, source, dest, links):
+        self.pages[source] = (dest, [tuple(link) for link in links])
+
+    def page_data(self, source):
+        return self.pages[source][1]
+
+    def take(self):
+        pages = self.pages
+        self.pages = {}
+        return pages
+
+    def merge(self, pages):
+        self.pages.update(pages)
+
+    def check(self, outputs, dest_dir_path):
+        known = {os.path.relpath(path, dest_dir_path).replace(os.sep, "/") for path in outputs}
+        checked = 0
+        broken = []
+        linked = set()
+        for source in sorted(self.pages):
+            dest, links = self.pages[source]
+            from_url = page_url(dest, dest_dir_path)
+            relative = os.path.relpath(dest, dest_dir_path).replace(os.sep, "/")
+            for kind, url in links:
+                if not is_internal(url):
+                    continue
+                checked += 1
+                target = next(
+                    (path for path in output_candidates(resolve_target(url, from_url)) if path in known),
+                    None,
+                )
+                if target is None:
+                    broken.append((source, kind, url))
+                elif target != relative:
+                    linked.add(target)
+
+        orphans = []
+        for source in sorted(self.pages):
+            relative = os.path.relpath(self.pages[source][0], dest_dir_path).replace(os.sep, "/")
+            if relative != "index.html" and relative not in linked:
+                orphans.append(source)
+        return LinkReport(checked, broken, orphans)
@@ -1,36 +1,346 @@
+import argparse
 import os
 import shutil
-import sys
 
-from copystatic import copy_files_recursive
-from page_generator import generate_pages_recursive
+from copystatic import LINK_MODES, copy_files_recursive, fingerprint_static, sync_files_recursive
+from image_pipeline import DEFAULT_WIDTHS, IMAGE_BACKENDS, ImagePipeline
+from link_index import LinkIndex
+from manifest import BuildManifest
+from metadata import build_site_index, write_site_index
+from page_generator import collect_pages, generate_pages_recursive
+from precompress import MIN_SIZE, Compressor, remove_compressed_tree
+from profiling import profiler
+from ast_cache import AstCache
+from build_context import BuildContext
+from render_cache import RenderCache
+from search_index import SearchIndex
+from template import TemplateRegistry, register_asset_urls
+from watch import POLL_INTERVAL, SiteWatcher, serve
 
 dir_path_static = "./static"
 dir_path_docs = "./docs"
 dir_path_content = "./content"
 template_path = "./template.html"
+dir_path_templates = "./templates"
+manifest_path = "./.build-manifest.json"
+asset_manifest_path = "./docs/asset-manifest.json"
+dir_path_search = "./docs/search"
 
-def main():
-    basepath = "/"
-    if len(sys.argv) > 1:
-        basepath = sys.argv[1]
 
-    print(f"Deleting {dir_path_docs} directory...")
-    if os.path.exists(dir_path_docs):
-        shutil.rmtree(dir_path_docs)
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the static site into docs/.")
+    parser.add_argument("basepath", nargs="?", default="/")
+    parser.add_argument(
+        "--templates-dir",
+        default=dir_path_templates,
+        help="layouts and {{> partial }} includes; content/<section>/ pages use <section>.html, "
+        "or the layout named by a 'template' front matter key",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only rebuild outputs whose sources changed since the last build",
+    )
+    parser.add_argument(
+        "--sync-static",
+        action="store_true",
+        help="update static files in place instead of wiping docs/",
+    )
+    parser.add_argument(
+        "--link",
+        choices=LINK_MODES,
+        default="auto",
+        help="how --sync-static places files: reflink/hardlink on the same filesystem, else copy",
+    )
+    parser.add_argument(
+        "--copy-threads",
+        type=int,
+        default=8,
+        help="threads used by --sync-static for plain copies",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="render pages across N worker processes",
+    )
+    parser.add_argument(
+        "--render-cache",
+        action="store_true",
+        help="reuse rendered HTML for identical markdown blocks",
+    )
+    parser.add_argument(
+        "--render-cache-size",
+        type=int,
+        default=4096,
+        help="number of fragments kept in the in-memory LRU",
+    )
+    parser.add_argument(
+        "--render-cache-dir",
+        help="directory for an on-disk fragment store shared between builds",
+    )
+    parser.add_argument(
+        "--ast-cache-dir",
+        help="directory caching parsed page trees, so template or basepath changes skip parsing",
+    )
+    parser.add_argument(
+        "--io-threads",
+        type=int,
+        default=0,
+        help="overlap source reads and output writes with rendering using N threads per stage; "
+        "single-process builds only, so it cannot be combined with --jobs",
+    )
+    parser.add_argument(
+        "--stream-threshold",
+        type=float,
+        default=16,
+        metavar="MB",
+        help="parse and write sources larger than this block by block",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="build-profile.json",
+        metavar="JSON_PATH",
+        help="record per-phase timings and write them as JSON (default: build-profile.json)",
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=10,
+        help="number of slowest pages to report when profiling",
+    )
+    parser.add_argument(
+        "--site-index",
+        metavar="JSON_PATH",
+        help="write titles, urls and dates of every page, read from file heads only",
+    )
+    parser.add_argument(
+        "--fingerprint-assets",
+        action="store_true",
+        help=f"also publish static files as name.<hash>.ext, point pages at them and list them in {asset_manifest_path}",
+    )
+    parser.add_argument(
+        "--images",
+        action="store_true",
+        help="generate resized variants of static images and emit srcset, width and height",
+    )
+    parser.add_argument(
+        "--image-widths",
+        type=lambda value: [int(width) for width in value.split(",")],
+        default=list(DEFAULT_WIDTHS),
+        metavar="W1,W2,...",
+        help="variant widths in pixels; images are never scaled up",
+    )
+    parser.add_argument(
+        "--image-backend",
+        choices=IMAGE_BACKENDS,
+        default="auto",
+        help="Pillow when installed (auto), or the built-in PNG-only resizer",
+    )
+    parser.add_argument(
+        "--image-cache-dir",
+        default=".image-cache",
+        help="directory keeping resized derivatives between builds",
+    )
+    parser.add_argument(
+        "--check-links",
+        action="store_true",
+        help="report broken internal links and images, and pages nothing links to",
+    )
+    parser.add_argument(
+        "--search-index",
+        action="store_true",
+        help=f"write a sharded inverted index of page text to {dir_path_search}",
+    )
+    parser.add_argument(
+        "--search-shard-kb",
+        type=int,
+        default=64,
+        help="upper bound on the size of each search index shard",
+    )
+    parser.add_argument(
+        "--precompress",
+        action="store_true",
+        help="write .gz (and .br, when brotli is installed) siblings of html, css, js and svg outputs",
+    )
+    parser.add_argument(
+        "--compress-min-size",
+        type=int,
+        default=MIN_SIZE,
+        metavar="BYTES",
+        help="leave outputs smaller than this uncompressed",
+    )
+    parser.add_argument(
+        "--compress-threads",
+        type=int,
+        default=4,
+        help="threads compressing pages while the build is still rendering",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="after building, rebuild affected outputs whenever sources change; uses filesystem "
+        f"notifications when watchdog is installed, else rescans every {POLL_INTERVAL * 1000:.0f} ms",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help=f"serve {dir_path_docs} over HTTP from this process",
+    )
+    parser.add_argument("--port", type=int, default=8888)
+    args = parser.parse_args(argv)
+    if args.jobs > 1 and args.io_threads:
+        parser.error("--io-threads cannot be combined with --jobs")
+    return args
 
-    print(f"Copying static files to {dir_path_docs} directory...")
-    copy_files_recursive(dir_path_static, dir_path_docs)
+
+def main(argv=None):
+    args = parse_args(argv)
+    basepath = args.basepath
+    profiler.enabled = args.profile is not None
+    if not args.fingerprint_assets:
+        # The asset map is process-global; drop one left by an earlier build before layouts compile.
+        register_asset_urls({})
+
+    templates = TemplateRegistry(template_path, args.templates_dir, dir_path_content, basepath)
+    manifest = BuildManifest(
+        manifest_path,
+        templates.fingerprint(),
+        basepath,
+        fresh=not args.incremental,
+    )
+
+    context = BuildContext(
+        stream_threshold=int(args.stream_threshold * 1024 * 1024),
+        io_threads=args.io_threads,
+    )
+    if args.render_cache or args.render_cache_dir:
+        context.render_cache = RenderCache(args.render_cache_size, args.render_cache_dir)
+    if args.ast_cache_dir:
+        context.ast_cache = AstCache(args.ast_cache_dir)
+    if args.check_links:
+        context.link_index = LinkIndex()
+    if args.search_index:
+        context.search_index = SearchIndex(args.search_shard_kb * 1024)
+    if args.precompress:
+        context.compressor = Compressor(min_size=args.compress_min_size, threads=args.compress_threads)
+
+    if not (args.incremental or args.sync_static):
+        print(f"Deleting {dir_path_docs} directory...")
+        if os.path.exists(dir_path_docs):
+            shutil.rmtree(dir_path_docs)
+
+    if args.sync_static:
+        print(f"Syncing static files to {dir_path_docs} directory...")
+        stats = sync_files_recursive(
+            dir_path_static, dir_path_docs, manifest, args.link, args.copy_threads
+        )
+        print(
+            f"Static sync: {stats['copied']} copied, {stats['hardlinked']} hardlinked, "
+            f"{stats['reflinked']} reflinked, {stats['skipped']} unchanged"
+        )
+    else:
+        print(f"Copying static files to {dir_path_docs} directory...")
+        copy_files_recursive(dir_path_static, dir_path_docs, manifest)
+
+    # Build inputs that change rendered pages without touching their sources.
+    # A disabled input is recorded as None, so turning it off rebuilds pages too.
+    render_inputs = {"assets": None, "images": None}
+    if args.fingerprint_assets:
+        context.assets = fingerprint_static(dir_path_static, dir_path_docs, manifest)
+        context.assets.install()
+        context.assets.write(asset_manifest_path)
+        templates.compile()
+        render_inputs["assets"] = context.assets.fingerprint()
+
+    images = None
+    if args.images:
+        print("Generating image variants...")
+        images = ImagePipeline(
+            args.image_cache_dir,
+            args.image_widths,
+            args.image_backend,
+            args.jobs if args.jobs > 1 else None,
+        )
+        context.images = images.process(dir_path_static, dir_path_docs, manifest)
+        render_inputs["images"] = context.images.fingerprint()
+
+    for name, fingerprint in render_inputs.items():
+        manifest.require(name, fingerprint)
+    for cache in (context.render_cache, context.ast_cache):
+        if cache is not None:
+            cache.salt = ":".join(
+                f"{name}={fingerprint}" for name, fingerprint in sorted(render_inputs.items()) if fingerprint
+            )
 
     print("Generating pages from content directory...")
     generate_pages_recursive(
         dir_path_content,
-        template_path,
+        templates,
         dir_path_docs,
         basepath,
+        manifest,
+        args.jobs,
+        context,
     )
 
+    if args.site_index:
+        index = build_site_index(collect_pages(dir_path_content, dir_path_docs), dir_path_docs)
+        write_site_index(index, args.site_index)
+        print(f"Wrote site index of {len(index)} pages to {args.site_index}")
+
+    if context.search_index is not None:
+        print(context.search_index.write(dir_path_search, dir_path_docs, basepath))
+    if context.link_index is not None:
+        print(context.link_index.check(manifest.outputs(), dir_path_docs).report())
+
+    manifest.remove_stale()
+    manifest.precompressed = context.compressor is not None
+    manifest.save()
+    if context.compressor is not None:
+        # Pages were queued as they were written; this picks up static files and skipped pages.
+        with profiler.phase("precompress"):
+            context.compressor.compress_tree(dir_path_docs)
+    elif manifest.previous_precompressed:
+        print(f"Removed {remove_compressed_tree(dir_path_docs)} precompressed files")
+    if args.incremental:
+        print(f"Skipped {manifest.skipped} unchanged files")
+    if context.assets is not None:
+        print(context.assets.report())
+    if images is not None:
+        print(images.report())
+    for report in context.reports():
+        print(report)
+    if profiler.enabled:
+        print(profiler.report(args.profile_top))
+        profiler.write_json(args.profile, args.profile_top)
+        print(f"Wrote build profile to {args.profile}")
+
     print("Site generation complete!")
 
+    server = server_thread = None
+    if args.serve:
+        server, server_thread = serve(dir_path_docs, args.port)
+    try:
+        if args.watch:
+            SiteWatcher(
+                dir_path_content,
+                dir_path_static,
+                template_path,
+                dir_path_docs,
+                basepath,
+                context,
+                args.templates_dir,
+            ).run()
+        elif server_thread is not None:
+            server_thread.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if server is not None:
+            server.shutdown()
+
 if __name__ == "__main__":
     main()
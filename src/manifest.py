@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+
+from precompress import remove_siblings
+
+MANIFEST_VERSION = 2
+# Image variants are outputs without a source file of their own, keyed by destination.
+SECTIONS = ("pages", "static", "variants")
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def stat_key(size, mtime_ns):
+    return f"{size}:{mtime_ns}"
+
+
+def file_stat_key(path):
+    st = os.stat(path)
+    return stat_key(st.st_size, st.st_mtime_ns)
+
+
+class BuildManifest:
+    def __init__(self, path, template_hash, basepath, fresh=False):
+        self.path = path
+        self.template_hash = template_hash
+        self.basepath = basepath
+        self.previous = {section: {} for section in SECTIONS}
+        self.previous_inputs = {}
+        self.inputs = {}
+        # Whether .gz/.br siblings may exist next to outputs.
+        self.previous_precompressed = False
+        self.precompressed = False
+        self.current = {section: {} for section in SECTIONS}
+        self.pages_valid = False
+        self.skipped = 0
+        # A fresh build rebuilds everything but still needs the previous
+        # entries to find outputs whose sources were removed.
+        self.reuse = not fresh
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != MANIFEST_VERSION:
+            return
+        for section in SECTIONS:
+            self.previous[section] = data.get(section, {})
+        self.previous_inputs = data.get("inputs", {})
+        self.previous_precompressed = data.get("precompressed", False)
+        # A template or basepath change invalidates every page.
+        self.pages_valid = (
+            data.get("template") == self.template_hash
+            and data.get("basepath") == self.basepath
+        )
+
+    def require(self, name, fingerprint):
+        # Pages rendered against a different version of this input are rebuilt.
+        self.inputs[name] = fingerprint
+        if self.previous_inputs.get(name) != fingerprint:
+            self.pages_valid = False
+
+    def is_fresh(self, section, source, key, dest):
+        if not self.reuse:
+            return False
+        if section == "pages" and not self.pages_valid:
+            return False
+        entry = self.previous[section].get(source)
+        if entry is None:
+            return False
+        return entry["key"] == key and entry["dest"] == dest and os.path.exists(dest)
+
+    def record(self, section, source, key, dest):
+        self.current[section][source] = {"key": key, "dest": dest}
+
+    def previous_entry(self, section, source):
+        return self.previous[section].get(source)
+
+    def attach(self, section, source, **fields):
+        self.current[section][source].update(fields)
+
+    def outputs(self):
+        return [entry["dest"] for section in self.current.values() for entry in section.values()]
+
+    def skip(self, section, source):
+        self.current[section][source] = self.previous[section][source]
+        self.skipped += 1
+
+    def remove_stale(self):
+        removed = []
+        # An output may move between sections, so liveness is checked across all of them.
+        live = set(self.outputs())
+        for section in SECTIONS:
+            for source, entry in self.previous[section].items():
+                if source in self.current[section] or entry["dest"] in live:
+                    continue
+                if os.path.isfile(entry["dest"]):
+                    print(f" - removing stale {entry['dest']}")
+                    os.remove(entry["dest"])
+                    removed.append(entry["dest"])
+                remove_siblings(entry["dest"])
+        return removed
+
+    def save(self):
+        data = {
+            "version": MANIFEST_VERSION,
+            "template": self.template_hash,
+            "basepath": self.basepath,
+            "inputs": self.inputs,
+            "precompressed": self.precompressed,
+        }
+        data.update(self.current)
+        with open(self.path, 'w') as f:
+            json.dump(data, f, indent=1, sort_keys=True)
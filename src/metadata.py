@@ -0,0 +1,105 @@
+import io
+import itertools
+import json
+import os
+
+FRONT_MATTER_FENCES = {"---": ":", "+++": "="}
+
+
+class PageMetadata:
+    __slots__ = ("source", "url", "title", "date", "front_matter")
+
+    def __init__(self, source, url, title, date=None, front_matter=None):
+        self.source = source
+        self.url = url
+        self.title = title
+        self.date = date
+        self.front_matter = front_matter or {}
+
+    def __eq__(self, other):
+        return (
+            self.source == other.source
+            and self.url == other.url
+            and self.title == other.title
+            and self.date == other.date
+            and self.front_matter == other.front_matter
+        )
+
+    def __repr__(self):
+        return f"PageMetadata({self.source}, {self.url}, {self.title}, {self.date})"
+
+    def to_dict(self):
+        return {"source": self.source, "url": self.url, "title": self.title, "date": self.date}
+
+
+def _parse_front_matter_line(line, separator):
+    key, sep, value = line.partition(separator)
+    if not sep or not key.strip():
+        return None
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        value = value[1:-1]
+    return key.strip(), value
+
+
+def read_front_matter(lines):
+    # Returns the front matter and the lines read that belong to the body. A
+    # block that is never closed is body text, so its lines are handed back.
+    first = next(lines, None)
+    if first is None:
+        return {}, []
+    fence = first.strip()
+    if fence not in FRONT_MATTER_FENCES:
+        return {}, [first]
+    separator = FRONT_MATTER_FENCES[fence]
+    front_matter = {}
+    consumed = [first]
+    for line in lines:
+        if line.strip() == fence:
+            return front_matter, []
+        consumed.append(line)
+        pair = _parse_front_matter_line(line, separator)
+        if pair is not None:
+            front_matter[pair[0]] = pair[1]
+    return {}, consumed
+
+
+def split_front_matter(markdown):
+    if not markdown.startswith(tuple(FRONT_MATTER_FENCES)):
+        return {}, markdown
+    lines = io.StringIO(markdown)
+    front_matter, pending = read_front_matter(lines)
+    if pending:
+        return {}, markdown
+    return front_matter, markdown[lines.tell():]
+
+
+def read_page_metadata(path, url=None):
+    with open(path, 'r') as f:
+        lines = iter(f)
+        front_matter, pending = read_front_matter(lines)
+        title = front_matter.get("title")
+        if title is None:
+            for line in itertools.chain(pending, lines):
+                if line.startswith("# "):
+                    title = line[2:].strip()
+                    break
+    return PageMetadata(path, url, title, front_matter.get("date"), front_matter)
+
+
+def page_url(dest_path, dest_dir_path):
+    relative = os.path.relpath(dest_path, dest_dir_path).replace(os.sep, "/")
+    if relative == "index.html":
+        return "/"
+    if relative.endswith("/index.html"):
+        return "/" + relative[:-len("index.html")]
+    return "/" + relative
+
+
+def build_site_index(pages, dest_dir_path):
+    return [read_page_metadata(from_path, page_url(dest_path, dest_dir_path)) for from_path, dest_path in pages]
+
+
+def write_site_index(index, path):
+    with open(path, 'w') as f:
+        json.dump([page.to_dict() for page in index], f, indent=1)
@@ -0,0 +1,81 @@
+import hashlib
+import os
+import stat
+import tempfile
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def matches_file(path, size, digest):
+    try:
+        if os.path.getsize(path) != size:
+            return False
+    except FileNotFoundError:
+        return False
+    return file_digest(path) == digest
+
+
+def output_mode(dest_path):
+    # mkstemp creates files as 0600. A replaced file keeps its mode; a new one
+    # takes its directory's read/write bits, which the umask already shaped.
+    try:
+        return stat.S_IMODE(os.stat(dest_path).st_mode)
+    except FileNotFoundError:
+        return stat.S_IMODE(os.stat(os.path.dirname(dest_path) or ".").st_mode) & 0o666
+
+
+def temp_output(dest_path):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(dest_path) or ".", suffix=".tmp")
+    os.chmod(tmp_path, output_mode(dest_path))
+    return os.fdopen(fd, 'wb'), tmp_path
+
+
+def _discard(tmp_path):
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+
+def write_if_changed(dest_path, text):
+    data = text.encode()
+    if matches_file(dest_path, len(data), hashlib.sha256(data).digest()):
+        return False
+    f, tmp_path = temp_output(dest_path)
+    try:
+        with f:
+            f.write(data)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        _discard(tmp_path)
+        raise
+    return True
+
+
+def stream_if_changed(dest_path, chunks):
+    # The new output is only known once every chunk is written, so it goes to
+    # a temp file first and is dropped if it matches what is already there.
+    digest = hashlib.sha256()
+    size = 0
+    f, tmp_path = temp_output(dest_path)
+    try:
+        with f:
+            for chunk in chunks:
+                data = chunk.encode()
+                digest.update(data)
+                size += len(data)
+                f.write(data)
+        if matches_file(dest_path, size, digest.digest()):
+            os.remove(tmp_path)
+            return False
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        _discard(tmp_path)
+        raise
+    return True
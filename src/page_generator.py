@@ -1,46 +1,360 @@
+import io
+import itertools
 import os
-from pathlib import Path
-from block_markdown import markdown_to_html_node
+import time
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import FIRST_EXCEPTION, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from ast_cache import ast_key, decode_tree
+from block_markdown import iter_markdown_html, markdown_to_html_node, observe_blocks, rendering_fingerprint, scan_blocks
+from build_context import STREAM_THRESHOLD, BuildContext
+from manifest import file_hash
+from metadata import read_front_matter, read_page_metadata, split_front_matter
+from output_writer import stream_if_changed, write_if_changed
+from profiling import profiler
+from template import Template, TemplateRegistry, load_template, select_template
+from tree_walker import PAGE, make_output_dirs, walk_tree
 
 def extract_title(markdown):
-    lines = markdown.split('\n')
-    for line in lines:
+    for line in io.StringIO(markdown):
         if line.startswith('# '):
             return line[2:].strip()
     raise ValueError("No H1 header found in markdown")
 
-def generate_page(from_path, template_path, dest_path, basepath="/"):
+def generate_page(from_path, template, dest_path, basepath="/", context=None):
+    if not isinstance(template, (Template, TemplateRegistry)):
+        template = load_template(template, basepath)
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    with _rendering(context):
+        render_page(from_path, template, dest_path, basepath, context)
+
+def _rendering(context):
+    return context.rendering() if context is not None else nullcontext()
+
+def parse_page(markdown_content, basepath="/", context=None, observe=None):
+    if context is None:
+        return markdown_to_html_node(markdown_content, basepath, observe=observe)
+    ast_cache = context.ast_cache
+    if ast_cache is None:
+        return markdown_to_html_node(markdown_content, basepath, context.render_cache, observe)
+
+    key = ast_key(markdown_content, f"{rendering_fingerprint()}:{ast_cache.salt}")
+    html_node = ast_cache.get(key, basepath)
+    if html_node is None:
+        # Cached trees are stored basepath-neutral and rewritten on load, so
+        # they are parsed without render-cache fragments baked in.
+        html_node = markdown_to_html_node(markdown_content, observe=observe)
+        data = ast_cache.put(key, html_node)
+        if basepath != "/":
+            html_node = decode_tree(data, basepath)
+    elif observe is not None:
+        # A cached tree skips parsing, so page indexes rescan the source.
+        observe_blocks(scan_blocks(markdown_content), observe)
+    return html_node
+
+def _page_observer(context, page, title):
+    if context is None or page is None:
+        return None
+    observers = [index.start_page(page[0], page[1], title) for index in context.page_indexes()]
+    if not observers:
+        return None
+    if len(observers) == 1:
+        return observers[0]
+
+    def observe(block_type, lines):
+        for observer in observers:
+            observer(block_type, lines)
+    return observe
+
+def _template_values(front_matter, title, content):
+    # Front matter fields are available to layouts as {{ key }} slots.
+    values = dict(front_matter)
+    values["Title"] = title
+    values["Content"] = content
+    return values
+
+def page_values(markdown_content, basepath="/", context=None, page=None):
+    front_matter, markdown_content = split_front_matter(markdown_content)
+    title = front_matter.get("title") or extract_title(markdown_content)
+
+    # Page indexes record the title while the page renders, not in a later pass.
+    observe = _page_observer(context, page, title)
+    with profiler.phase("markdown_to_html_node"):
+        html_node = parse_page(markdown_content, basepath, context, observe)
+    return front_matter, _template_values(front_matter, title, html_node.iter_html())
+
+def _log_page(from_path, dest_path, template_path):
     print(f"Generating page from {from_path} to {dest_path} using {template_path}")
 
+def _timed_chunks(chunks, elapsed):
+    # elapsed[0] accumulates the time spent producing chunks, not consuming them.
+    iterator = iter(chunks)
+    while True:
+        started = time.perf_counter()
+        chunk = next(iterator, None)
+        elapsed[0] += time.perf_counter() - started
+        if chunk is None:
+            return
+        yield chunk
+
+def render_page_streaming(from_path, templates, dest_path, basepath="/", context=None, log=True):
+    started = time.perf_counter()
+    with profiler.phase("read"):
+        metadata = read_page_metadata(from_path)
+    if metadata.title is None:
+        raise ValueError("No H1 header found in markdown")
+    template = select_template(templates, from_path, metadata.front_matter)
+    if log:
+        _log_page(from_path, dest_path, template.path)
+    cache = context.render_cache if context is not None else None
+
+    with open(from_path, 'r') as source:
+        _, pending = read_front_matter(source)
+        lines = itertools.chain(pending, source)
+        observe = _page_observer(context, (from_path, dest_path), metadata.title)
+        content = iter_markdown_html(lines, basepath, cache, observe)
+        parsed = [0.0]
+        rendered = [0.0]
+        if profiler.enabled:
+            content = _timed_chunks(content, parsed)
+        values = _template_values(metadata.front_matter, metadata.title, content)
+        chunks = template.iter_render(values)
+        if profiler.enabled:
+            chunks = _timed_chunks(chunks, rendered)
+        write_started = time.perf_counter()
+        changed = stream_if_changed(dest_path, chunks)
+    _page_written(context, dest_path, changed)
+    if profiler.enabled:
+        # Parsing, serialization and disk writes interleave; each gets its share.
+        profiler.record("markdown_to_html_node", parsed[0])
+        profiler.record("to_html", rendered[0] - parsed[0])
+        profiler.record("write", time.perf_counter() - write_started - rendered[0])
+        profiler.record_file(from_path, time.perf_counter() - started)
+    return template
+
+def _page_written(context, dest_path, changed):
+    if context is None:
+        return
+    context.record_write(changed)
+    # Compression starts as soon as each page is on disk.
+    if context.compressor is not None:
+        context.compressor.submit(dest_path)
+
+def render_page(from_path, templates, dest_path, basepath="/", context=None, log=True):
+    threshold = context.stream_threshold if context is not None else STREAM_THRESHOLD
+    if os.path.getsize(from_path) > threshold:
+        return render_page_streaming(from_path, templates, dest_path, basepath, context, log)
+
+    started = time.perf_counter()
+    with profiler.phase("read"):
+        with open(from_path, 'r') as f:
+            markdown_content = f.read()
+
+    front_matter, values = page_values(markdown_content, basepath, context, (from_path, dest_path))
+    template = select_template(templates, from_path, front_matter)
+    if log:
+        _log_page(from_path, dest_path, template.path)
+
+    if not profiler.enabled:
+        _page_written(context, dest_path, stream_if_changed(dest_path, template.iter_render(values)))
+        return template
+
+    # Profiling materializes the page so serialization and disk time are reported separately.
+    with profiler.phase("to_html"):
+        final_html = template.render(values)
+    with profiler.phase("write"):
+        changed = write_if_changed(dest_path, final_html)
+    _page_written(context, dest_path, changed)
+    profiler.record_file(from_path, time.perf_counter() - started)
+    return template
+
+def collect_pages(dir_path_content, dest_dir_path):
+    return [(entry.source, entry.dest) for entry in walk_tree(dir_path_content, dest_dir_path, PAGE)]
+
+_worker_context = None
+_worker_templates = None
+
+def _init_worker(context, templates, profile):
+    global _worker_context, _worker_templates
+    _worker_context = context
+    # Compiled layouts ship once per worker instead of with every page.
+    _worker_templates = templates
+    if context.assets is not None:
+        context.assets.install()
+    profiler.enabled = profile
+    # Forked workers inherit the parent's samples; start from a clean slate.
+    profiler.take()
+
+def _render_page_in_worker(from_path, dest_path, basepath):
+    # Workers finish in any order, so the parent logs pages in collection order.
+    with _worker_context.rendering():
+        template = render_page(from_path, _worker_templates, dest_path, basepath, _worker_context, log=False)
+    stats = {"template": template.path, "context": _worker_context.take_stats(), "profile": None}
+    if profiler.enabled:
+        stats["profile"] = profiler.take()
+    return stats
+
+def generate_pages_parallel(pages, templates, basepath="/", jobs=None, context=None):
+    if context is None:
+        context = BuildContext()
+    initargs = (context, templates, profiler.enabled)
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=initargs) as executor:
+        futures = {}
+        for from_path, dest_path in pages:
+            future = executor.submit(_render_page_in_worker, from_path, dest_path, basepath)
+            futures[future] = from_path
+
+        done, not_done = wait(futures, return_when=FIRST_EXCEPTION)
+        failed = [future for future in futures if future in done and future.exception()]
+        if failed:
+            for future in not_done:
+                future.cancel()
+            error = failed[0].exception()
+            raise _page_error(futures[failed[0]], error) from error
+
+        for future, (from_path, dest_path) in zip(futures, pages):
+            stats = future.result()
+            _log_page(from_path, dest_path, stats["template"])
+            context.merge_stats(stats["context"])
+            if stats["profile"] is not None:
+                profiler.merge(stats["profile"])
+
+def _read_source(from_path):
+    started = time.perf_counter()
     with open(from_path, 'r') as f:
-        markdown_content = f.read()
-    with open(template_path, 'r') as f:
-        template_content = f.read()
+        return f.read(), time.perf_counter() - started
+
+def _write_output(dest_path, html):
+    started = time.perf_counter()
+    changed = write_if_changed(dest_path, html)
+    return changed, time.perf_counter() - started
+
+def _page_error(from_path, error):
+    return RuntimeError(f"Failed to generate page from {from_path}: {error}")
+
+def _result_or_raise(future, from_path):
+    try:
+        return future.result()
+    except Exception as e:
+        raise _page_error(from_path, e) from e
+
+# Bytes of sources read ahead, and of rendered pages waiting for a writer, each.
+PIPELINE_BUFFER = 64 * 1024 * 1024
 
-    html_content = markdown_to_html_node(markdown_content).to_html()
+def generate_pages_pipelined(pages, templates, basepath="/", context=None, io_threads=8, depth=32, buffer=PIPELINE_BUFFER):
+    # Reads are prefetched up to `depth` pages (or `buffer` bytes) ahead and
+    # writes may lag as far behind, so memory stays bounded while I/O
+    # overlaps rendering. Pages over the stream threshold are never buffered.
+    stream_threshold = context.stream_threshold if context is not None else STREAM_THRESHOLD
+    pending_pages = iter(pages)
+    reads = deque()
+    writes = deque()
+    read_bytes = write_bytes = 0
+    with ThreadPoolExecutor(io_threads) as readers, ThreadPoolExecutor(io_threads) as writers:
+        def prefetch():
+            nonlocal read_bytes
+            while len(reads) < depth and read_bytes < buffer:
+                page = next(pending_pages, None)
+                if page is None:
+                    return
+                size = os.path.getsize(page[0])
+                if size > stream_threshold:
+                    reads.append((page, 0, None))
+                    continue
+                read_bytes += size
+                reads.append((page, size, readers.submit(_read_source, page[0])))
 
-    title = extract_title(markdown_content)
+        def finish_write():
+            nonlocal write_bytes
+            from_path, dest_path, size, seconds, write = writes.popleft()
+            write_bytes -= size
+            changed, write_seconds = _result_or_raise(write, from_path)
+            _page_written(context, dest_path, changed)
+            if profiler.enabled:
+                profiler.record("write", write_seconds)
+                profiler.record_file(from_path, seconds + write_seconds)
 
-    final_html = template_content.replace("{{ Title }}", title)
-    final_html = final_html.replace("{{ Content }}", html_content)
+        prefetch()
+        while reads:
+            (from_path, dest_path), size, read = reads.popleft()
+            read_bytes -= size
+            if read is None:
+                try:
+                    render_page_streaming(from_path, templates, dest_path, basepath, context)
+                except Exception as e:
+                    raise _page_error(from_path, e) from e
+                prefetch()
+                continue
+            markdown_content, read_seconds = _result_or_raise(read, from_path)
+            prefetch()
+            started = time.perf_counter()
+            try:
+                front_matter, values = page_values(markdown_content, basepath, context, (from_path, dest_path))
+                template = select_template(templates, from_path, front_matter)
+                _log_page(from_path, dest_path, template.path)
+                with profiler.phase("to_html"):
+                    html = template.render(values)
+            except Exception as e:
+                raise _page_error(from_path, e) from e
+            if profiler.enabled:
+                profiler.record("read", read_seconds)
+            seconds = read_seconds + time.perf_counter() - started
 
-    final_html = final_html.replace('href="/', f'href="{basepath}')
-    final_html = final_html.replace('src="/', f'src="{basepath}')
+            write_bytes += len(html)
+            writes.append((from_path, dest_path, len(html), seconds, writers.submit(_write_output, dest_path, html)))
+            while len(writes) > depth or write_bytes > buffer:
+                finish_write()
 
-    dest_dir = os.path.dirname(dest_path)
-    if not os.path.exists(dest_dir):
-        os.makedirs(dest_dir)
+        while writes:
+            finish_write()
 
-    with open(dest_path, 'w') as f:
-        f.write(final_html)
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath="/", manifest=None, jobs=1, context=None):
+    if jobs > 1 and context is not None and context.io_threads:
+        # Worker processes already overlap one page's I/O with another's rendering.
+        raise ValueError("io_threads pipelining cannot be combined with jobs > 1")
+    indexes = context.page_indexes() if context is not None else []
+    pending = []
+    skipped = []
+    for from_path, dest_path in collect_pages(dir_path_content, dest_dir_path):
+        if manifest is not None:
+            key = file_hash(from_path)
+            if manifest.is_fresh("pages", from_path, key, dest_path):
+                entry = manifest.previous_entry("pages", from_path)
+                # Pages built before an index was enabled have to be rendered once more.
+                if all(index.manifest_field in entry for index in indexes):
+                    manifest.skip("pages", from_path)
+                    skipped.append((from_path, dest_path, entry))
+                    continue
+            manifest.record("pages", from_path, key, dest_path)
+        pending.append((from_path, dest_path))
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath="/"):
-    for entry in os.listdir(dir_path_content):
-        from_path = os.path.join(dir_path_content, entry)
-        dest_path = os.path.join(dest_dir_path, entry)
+    if isinstance(template_path, TemplateRegistry):
+        templates = template_path
+    else:
+        templates = load_template(template_path, basepath)
+    # Every output directory is created once up front; workers only write files.
+    make_output_dirs(dest_path for _, dest_path in pending)
+    if jobs > 1 and len(pending) > 1:
+        generate_pages_parallel(pending, templates, basepath, jobs, context)
+    elif context is not None and context.io_threads:
+        with context.rendering():
+            generate_pages_pipelined(pending, templates, basepath, context, context.io_threads)
+    else:
+        with _rendering(context):
+            for from_path, dest_path in pending:
+                try:
+                    render_page(from_path, templates, dest_path, basepath, context)
+                except Exception as e:
+                    raise _page_error(from_path, e) from e
 
-        if os.path.isfile(from_path) and from_path.endswith(".md"):
-            dest_path_html = Path(dest_path).with_suffix(".html")
-            generate_page(from_path, template_path, str(dest_path_html), basepath)
-        elif os.path.isdir(from_path):
-            generate_pages_recursive(from_path, template_path, dest_path, basepath)
+    # Skipped pages join the indexes only now, so workers never ship them back.
+    for from_path, dest_path, entry in skipped:
+        for index in indexes:
+            index.add_page(from_path, dest_path, entry[index.manifest_field])
+    if manifest is not None and indexes:
+        for from_path, _ in pending:
+            manifest.attach(
+                "pages",
+                from_path,
+                **{index.manifest_field: index.page_data(from_path) for index in indexes},
+            )
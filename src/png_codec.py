@@ -0,0 +1,118 @@
+import struct
+import zlib
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# color type -> samples per pixel, for the 8-bit non-palette images we can decode.
+CHANNELS = {0: 1, 2: 3, 4: 2, 6: 4}
+
+
+def read_png_size(path):
+    with open(path, 'rb') as f:
+        head = f.read(24)
+    if head[:8] != PNG_SIGNATURE or head[12:16] != b"IHDR":
+        raise ValueError(f"not a PNG file: {path}")
+    return struct.unpack(">II", head[16:24])
+
+
+def _chunks(data):
+    position = len(PNG_SIGNATURE)
+    while position < len(data):
+        length, kind = struct.unpack_from(">I4s", data, position)
+        yield kind, data[position + 8:position + 8 + length]
+        position += 12 + length
+
+
+def _paeth(a, b, c):
+    p = a + b - c
+    pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+    if pa <= pb and pa <= pc:
+        return a
+    return b if pb <= pc else c
+
+
+def _unfilter(kind, row, previous, bpp):
+    if kind == 0:
+        return row
+    if kind == 2:
+        return bytearray((x + up) & 0xFF for x, up in zip(row, previous))
+    for i in range(len(row)):
+        left = row[i - bpp] if i >= bpp else 0
+        if kind == 1:
+            row[i] = (row[i] + left) & 0xFF
+        elif kind == 3:
+            row[i] = (row[i] + ((left + previous[i]) >> 1)) & 0xFF
+        elif kind == 4:
+            upper_left = previous[i - bpp] if i >= bpp else 0
+            row[i] = (row[i] + _paeth(left, previous[i], upper_left)) & 0xFF
+        else:
+            raise ValueError(f"invalid PNG filter type: {kind}")
+    return row
+
+
+def read_png(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:8] != PNG_SIGNATURE:
+        raise ValueError(f"not a PNG file: {path}")
+    header = None
+    compressed = []
+    for kind, body in _chunks(data):
+        if kind == b"IHDR":
+            header = struct.unpack(">IIBBBBB", body)
+        elif kind == b"IDAT":
+            compressed.append(body)
+        elif kind == b"IEND":
+            break
+    if header is None:
+        raise ValueError(f"PNG file has no header: {path}")
+    width, height, bit_depth, color_type, _, _, interlace = header
+    if bit_depth != 8 or color_type not in CHANNELS or interlace:
+        raise ValueError(f"unsupported PNG format in {path}")
+
+    channels = CHANNELS[color_type]
+    stride = width * channels
+    raw = zlib.decompress(b"".join(compressed))
+    rows = []
+    previous = bytearray(stride)
+    for y in range(height):
+        start = y * (stride + 1)
+        row = _unfilter(raw[start], bytearray(raw[start + 1:start + 1 + stride]), previous, channels)
+        rows.append(row)
+        previous = row
+    return width, height, color_type, rows
+
+
+def _chunk(kind, body):
+    return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+
+
+def write_png(path, width, height, color_type, rows):
+    header = struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0)
+    raw = b"".join(b"\x00" + bytes(row) for row in rows)
+    with open(path, 'wb') as f:
+        f.write(PNG_SIGNATURE)
+        f.write(_chunk(b"IHDR", header))
+        f.write(_chunk(b"IDAT", zlib.compress(raw, 9)))
+        f.write(_chunk(b"IEND", b""))
+
+
+def _spans(size, new_size):
+    return [(i * size // new_size, max((i + 1) * size // new_size, i * size // new_size + 1)) for i in range(new_size)]
+
+
+def resize_rows(rows, width, height, channels, new_width, new_height):
+    # Box filter: every output pixel averages the source pixels it covers.
+    x_spans = _spans(width, new_width)
+    resized = []
+    for y0, y1 in _spans(height, new_height):
+        totals = list(rows[y0])
+        for row in rows[y0 + 1:y1]:
+            totals = [a + b for a, b in zip(totals, row)]
+        out = bytearray(new_width * channels)
+        for x, (x0, x1) in enumerate(x_spans):
+            count = (x1 - x0) * (y1 - y0)
+            for c in range(channels):
+                total = sum(totals[x0 * channels + c:x1 * channels:channels])
+                out[x * channels + c] = (total + count // 2) // count
+        resized.append(out)
+    return resized
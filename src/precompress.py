@@ -0,0 +1,184 @@
+import gzip
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from output_writer import temp_output
+from tree_walker import walk_tree
+
+COMPRESSIBLE_SUFFIXES = (".html", ".css", ".js", ".svg")
+MIN_SIZE = 1024
+
+
+def _gzip(data):
+    # mtime=0 keeps the output identical across builds.
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _brotli(data):
+    return brotli.compress(data, quality=11)
+
+
+COMPRESSORS = {".gz": _gzip}
+if brotli is not None:
+    COMPRESSORS[".br"] = _brotli
+
+
+def is_compressible(path):
+    return path.endswith(COMPRESSIBLE_SUFFIXES)
+
+
+def _sibling_is_fresh(path, sibling):
+    try:
+        return os.stat(sibling).st_mtime_ns >= os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+
+def _remove(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def remove_siblings(path):
+    for suffix in COMPRESSORS:
+        _remove(path + suffix)
+
+
+def remove_compressed_tree(dest_dir_path):
+    # Siblings left by an earlier --precompress build would outlive edits to their outputs.
+    removed = 0
+    for entry in walk_tree(dest_dir_path, dest_dir_path):
+        original, suffix = os.path.splitext(entry.source)
+        if suffix in COMPRESSORS and is_compressible(original):
+            os.remove(entry.source)
+            removed += 1
+    return removed
+
+
+def compress_file(path, suffixes=None, min_size=MIN_SIZE):
+    if suffixes is None:
+        suffixes = tuple(COMPRESSORS)
+    size = os.path.getsize(path)
+    result = {"path": path, "status": "fresh", "size": size, "compressed": {}}
+    if size < min_size:
+        for suffix in suffixes:
+            _remove(path + suffix)
+        result["status"] = "small"
+        return result
+
+    stale = [suffix for suffix in suffixes if not _sibling_is_fresh(path, path + suffix)]
+    if not stale:
+        return result
+    with open(path, 'rb') as f:
+        data = f.read()
+    for suffix in stale:
+        compressed = COMPRESSORS[suffix](data)
+        if len(compressed) >= len(data):
+            _remove(path + suffix)
+            continue
+        f, tmp_path = temp_output(path + suffix)
+        with f:
+            f.write(compressed)
+        os.replace(tmp_path, path + suffix)
+        result["compressed"][suffix] = len(compressed)
+    result["status"] = "compressed" if result["compressed"] else "incompressible"
+    return result
+
+
+class Compressor:
+    def __init__(self, suffixes=None, min_size=MIN_SIZE, threads=4):
+        self.suffixes = tuple(COMPRESSORS) if suffixes is None else tuple(suffixes)
+        self.min_size = min_size
+        self.threads = threads
+        self.pool = None
+        self.futures = []
+        self.seen = set()
+        self.counts = {"compressed": 0, "fresh": 0, "small": 0, "incompressible": 0}
+        self.original_bytes = {suffix: 0 for suffix in self.suffixes}
+        self.compressed_bytes = {suffix: 0 for suffix in self.suffixes}
+
+    def __getstate__(self):
+        # Worker processes compress inline; they are already one per core.
+        state = self.__dict__.copy()
+        state["pool"] = None
+        state["futures"] = []
+        state["threads"] = 0
+        return state
+
+    def submit(self, path):
+        if not is_compressible(path):
+            return
+        self.seen.add(path)
+        if not self.threads:
+            self._add(compress_file(path, self.suffixes, self.min_size))
+            return
+        if self.pool is None:
+            self.pool = ThreadPoolExecutor(self.threads)
+        self.futures.append(self.pool.submit(compress_file, path, self.suffixes, self.min_size))
+
+    def _add(self, result):
+        self.counts[result["status"]] += 1
+        for suffix, size in result["compressed"].items():
+            self.original_bytes[suffix] += result["size"]
+            self.compressed_bytes[suffix] += size
+
+    def finish(self):
+        futures, self.futures = self.futures, []
+        try:
+            for future in futures:
+                self._add(future.result())
+        finally:
+            # A new pool is started by the next submit, e.g. on the next watch rebuild.
+            if self.pool is not None:
+                self.pool.shutdown()
+                self.pool = None
+
+    def compress_tree(self, dest_dir_path):
+        for entry in walk_tree(dest_dir_path, dest_dir_path):
+            path = entry.source
+            original, suffix = os.path.splitext(path)
+            if suffix in COMPRESSORS:
+                # Siblings of outputs that no longer exist would be served in their place.
+                if is_compressible(original) and not os.path.exists(original):
+                    os.remove(path)
+                continue
+            if path not in self.seen:
+                self.submit(path)
+        self.finish()
+
+    def take(self):
+        self.finish()
+        stats = {
+            "seen": self.seen,
+            "counts": self.counts,
+            "original_bytes": self.original_bytes,
+            "compressed_bytes": self.compressed_bytes,
+        }
+        self.seen = set()
+        self.counts = dict.fromkeys(self.counts, 0)
+        self.original_bytes = dict.fromkeys(self.original_bytes, 0)
+        self.compressed_bytes = dict.fromkeys(self.compressed_bytes, 0)
+        return stats
+
+    def merge(self, stats):
+        self.seen.update(stats["seen"])
+        for name in ("counts", "original_bytes", "compressed_bytes"):
+            totals = getattr(self, name)
+            for key, value in stats[name].items():
+                totals[key] += value
+
+    def report(self):
+        formats = ", ".join(
+            f"{suffix[1:]} saved {self.original_bytes[suffix] - self.compressed_bytes[suffix]} bytes"
+            for suffix in self.suffixes
+        )
+        return (
+            f"Precompression: {self.counts['compressed']} compressed, {self.counts['fresh']} up to date, "
+            f"{self.counts['small']} under {self.min_size} bytes, {self.counts['incompressible']} incompressible "
+            f"({formats})"
+        )
@@ -0,0 +1,86 @@
+import json
+import time
+from contextlib import nullcontext
+
+_NULL_PHASE = nullcontext()
+
+
+class _Phase:
+    __slots__ = ("profiler", "name", "started")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class Profiler:
+    def __init__(self):
+        self.enabled = False
+        self.phases = {}
+        self.files = {}
+
+    def phase(self, name):
+        if not self.enabled:
+            return _NULL_PHASE
+        return _Phase(self, name)
+
+    def record(self, name, seconds, calls=1):
+        entry = self.phases.setdefault(name, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += calls
+
+    def record_file(self, path, seconds):
+        self.files[path] = self.files.get(path, 0.0) + seconds
+
+    def take(self):
+        snapshot = {"phases": self.phases, "files": self.files}
+        self.phases = {}
+        self.files = {}
+        return snapshot
+
+    def merge(self, snapshot):
+        for name, (seconds, calls) in snapshot["phases"].items():
+            self.record(name, seconds, calls)
+        for path, seconds in snapshot["files"].items():
+            self.record_file(path, seconds)
+
+    def slowest_files(self, count=10):
+        ranked = sorted(self.files.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:count]
+
+    def to_dict(self, slowest=10):
+        return {
+            "phases": {
+                name: {"seconds": round(seconds, 6), "calls": calls}
+                for name, (seconds, calls) in sorted(self.phases.items())
+            },
+            "slowest_files": [
+                {"source": path, "seconds": round(seconds, 6)}
+                for path, seconds in self.slowest_files(slowest)
+            ],
+        }
+
+    def report(self, slowest=10):
+        lines = ["Build profile:"]
+        for name, (seconds, calls) in sorted(self.phases.items(), key=lambda item: -item[1][0]):
+            lines.append(f"  {name:<24} {seconds * 1000:10.2f} ms  {calls:8d} calls")
+        if self.files:
+            lines.append(f"Slowest {min(slowest, len(self.files))} pages:")
+            for path, seconds in self.slowest_files(slowest):
+                lines.append(f"  {seconds * 1000:10.2f} ms  {path}")
+        return "\n".join(lines)
+
+    def write_json(self, path, slowest=10):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(slowest), f, indent=2)
+
+
+profiler = Profiler()
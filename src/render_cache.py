@@ -0,0 +1,75 @@
+import hashlib
+import os
+import tempfile
+from collections import OrderedDict
+
+# Bump whenever block or inline rendering changes so stale fragments are ignored.
+RENDER_CACHE_VERSION = 2
+
+
+def block_key(block_type, lines, basepath="/", salt=""):
+    digest = hashlib.sha256()
+    block_type = getattr(block_type, "value", block_type)
+    digest.update(f"{RENDER_CACHE_VERSION}\0{block_type}\0{basepath}\0{salt}\0".encode())
+    for line in lines:
+        digest.update(line.encode())
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+class RenderCache:
+    def __init__(self, maxsize=4096, directory=None):
+        self.maxsize = maxsize
+        self.directory = directory
+        self.entries = OrderedDict()
+        # Folded into every key; set it when inline rendering depends on build inputs.
+        self.salt = ""
+        self.hits = 0
+        self.misses = 0
+
+    def _disk_path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".html")
+
+    def get(self, key):
+        html = self.entries.get(key)
+        if html is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return html
+        if self.directory is not None:
+            try:
+                with open(self._disk_path(key), 'r') as f:
+                    html = f.read()
+            except FileNotFoundError:
+                html = None
+            if html is not None:
+                self._remember(key, html)
+                self.hits += 1
+                return html
+        self.misses += 1
+        return None
+
+    def put(self, key, html):
+        self._remember(key, html)
+        if self.directory is None:
+            return
+        path = self._disk_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Other build processes may share the directory, so publish atomically.
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, 'w') as f:
+            f.write(html)
+        os.replace(tmp_path, path)
+
+    def _remember(self, key, html):
+        if self.maxsize <= 0:
+            return
+        self.entries[key] = html
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def report(self):
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0.0
+        return f"Render cache: {self.hits} hits, {self.misses} misses ({rate:.1f}% hit rate)"
@@ -0,0 +1,119 @@
+import json
+import os
+import re
+
+from metadata import page_url
+from output_writer import write_if_changed
+from template import rewrite_url
+
+SEARCH_INDEX_VERSION = 1
+SHARD_BYTES = 64 * 1024
+# Letters and digits only; one-character terms are too common to be useful.
+TERM_PATTERN = re.compile(r"[^\W_]{2,}")
+
+
+def node_terms(nodes):
+    # Node text is what readers see: link text and image alt, never urls or markup.
+    terms = []
+    for node in nodes:
+        terms.extend(TERM_PATTERN.findall(node.text.lower()))
+    return terms
+
+
+def delta_encode(ids):
+    deltas = []
+    previous = 0
+    for doc_id in ids:
+        deltas.append(doc_id - previous)
+        previous = doc_id
+    return deltas
+
+
+def delta_decode(deltas):
+    ids = []
+    total = 0
+    for delta in deltas:
+        total += delta
+        ids.append(total)
+    return ids
+
+
+def shard_postings(postings, shard_bytes=SHARD_BYTES):
+    shards = []
+    shard = {}
+    size = 2
+    for term in sorted(postings):
+        entry_size = len(json.dumps({term: postings[term]}, separators=(",", ":"))) - 1
+        if shard and size + entry_size > shard_bytes:
+            shards.append(shard)
+            shard = {}
+            size = 2
+        shard[term] = postings[term]
+        size += entry_size
+    if shard:
+        shards.append(shard)
+    return shards
+
+
+class SearchIndex:
+    manifest_field = "search"
+
+    def __init__(self, shard_bytes=SHARD_BYTES):
+        self.shard_bytes = shard_bytes
+        # source -> (dest, title, set of terms); workers fill their own and the parent merges them.
+        self.pages = {}
+
+    def start_page(self, source, dest, title):
+        terms = set()
+        self.pages[source] = (dest, title, terms)
+        return lambda block_type, nodes: terms.update(node_terms(nodes))
+
+    def add_page(self, source, dest, data):
+        self.pages[source] = (dest, data["title"], set(data["terms"]))
+
+    def page_data(self, source):
+        _, title, terms = self.pages[source]
+        return {"title": title, "terms": sorted(terms)}
+
+    def take(self):
+        pages = self.pages
+        self.pages = {}
+        return pages
+
+    def merge(self, pages):
+        self.pages.update(pages)
+
+    def build(self, dest_dir_path, basepath="/"):
+        documents = []
+        postings = {}
+        # Document ids follow source order, so they do not depend on how work was split.
+        for doc_id, source in enumerate(sorted(self.pages)):
+            dest, title, terms = self.pages[source]
+            url = rewrite_url(page_url(dest, dest_dir_path), basepath)
+            documents.append({"url": url, "title": title})
+            for term in terms:
+                postings.setdefault(term, []).append(doc_id)
+        return documents, {term: delta_encode(ids) for term, ids in postings.items()}
+
+    def write(self, index_dir_path, dest_dir_path, basepath="/"):
+        documents, postings = self.build(dest_dir_path, basepath)
+        shards = shard_postings(postings, self.shard_bytes)
+        os.makedirs(index_dir_path, exist_ok=True)
+
+        files = []
+        written = 0
+        for number, shard in enumerate(shards):
+            name = f"terms-{number:03}.json"
+            terms = list(shard)
+            files.append({"file": name, "first": terms[0], "last": terms[-1]})
+            data = json.dumps(shard, separators=(",", ":"), ensure_ascii=False)
+            written += write_if_changed(os.path.join(index_dir_path, name), data)
+        index = {"version": SEARCH_INDEX_VERSION, "documents": documents, "shards": files}
+        data = json.dumps(index, separators=(",", ":"), ensure_ascii=False)
+        written += write_if_changed(os.path.join(index_dir_path, "index.json"), data)
+
+        live = {entry["file"] for entry in files}
+        for name in os.listdir(index_dir_path):
+            if name.startswith("terms-") and name not in live:
+                os.remove(os.path.join(index_dir_path, name))
+        return f"Search index: {len(postings)} terms, {len(documents)} pages, {len(shards)} shards ({written} files written)"
@@ -0,0 +1,80 @@
+import os
+import random
+
+DEFAULT_BLOCK_MIX = {
+    "paragraph": 6,
+    "heading": 2,
+    "code": 1,
+    "quote": 1,
+    "unordered_list": 2,
+    "ordered_list": 1,
+}
+
+WORDS = (
+    "ring hobbit wizard elf dwarf shire mordor river mountain forest song "
+    "road king tower sword fellowship journey shadow light star ancient"
+).split()
+
+
+def _words(rng, count):
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+
+def _inline(rng, words, link_density):
+    parts = []
+    for _ in range(words):
+        roll = rng.random()
+        if roll < link_density:
+            parts.append(f"[{_words(rng, 2)}](/{rng.choice(WORDS)}/{rng.randrange(1000)})")
+        elif roll < link_density * 1.2:
+            parts.append(f"![{rng.choice(WORDS)}](/images/{rng.choice(WORDS)}.png)")
+        elif roll < link_density * 1.2 + 0.05:
+            parts.append(f"**{_words(rng, 2)}**")
+        elif roll < link_density * 1.2 + 0.08:
+            parts.append(f"_{_words(rng, 2)}_")
+        elif roll < link_density * 1.2 + 0.10:
+            parts.append(f"`{rng.choice(WORDS)}()`")
+        else:
+            parts.append(rng.choice(WORDS))
+    return " ".join(parts)
+
+
+def _block(rng, kind, link_density):
+    if kind == "heading":
+        return "#" * rng.randint(2, 6) + " " + _inline(rng, 5, link_density)
+    if kind == "code":
+        body = "\n".join(f"    {_words(rng, 4)}" for _ in range(rng.randint(2, 8)))
+        return f"```\n{body}\n```"
+    if kind == "quote":
+        return "\n".join("> " + _inline(rng, 10, link_density) for _ in range(rng.randint(1, 3)))
+    if kind == "unordered_list":
+        return "\n".join("- " + _inline(rng, 8, link_density) for _ in range(rng.randint(2, 6)))
+    if kind == "ordered_list":
+        return "\n".join(
+            f"{i + 1}. " + _inline(rng, 8, link_density) for i in range(rng.randint(2, 6))
+        )
+    return "\n".join(_inline(rng, 14, link_density) for _ in range(rng.randint(1, 4)))
+
+
+def generate_markdown(rng, blocks=40, block_mix=None, link_density=0.05):
+    block_mix = block_mix or DEFAULT_BLOCK_MIX
+    kinds = list(block_mix)
+    weights = [block_mix[kind] for kind in kinds]
+    parts = ["# " + _words(rng, 4).title()]
+    for kind in rng.choices(kinds, weights, k=blocks):
+        parts.append(_block(rng, kind, link_density))
+    return "\n\n".join(parts) + "\n"
+
+
+def write_corpus(directory, pages=100, seed=0, blocks=40, block_mix=None, link_density=0.05, depth=2):
+    rng = random.Random(seed)
+    paths = []
+    for i in range(pages):
+        nesting = [f"section-{rng.randrange(4)}" for _ in range(rng.randint(0, depth))]
+        page_dir = os.path.join(directory, *nesting, f"page-{i}")
+        os.makedirs(page_dir, exist_ok=True)
+        path = os.path.join(page_dir, "index.md")
+        with open(path, 'w') as f:
+            f.write(generate_markdown(rng, blocks, block_mix, link_density))
+        paths.append(path)
+    return paths
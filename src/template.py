@@ -0,0 +1,165 @@
+import hashlib
+import os
+import re
+
+from tree_walker import walk_tree
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{ (\w+) \}\}")
+SITE_URL_ATTRIBUTE_PATTERN = re.compile(r'((?:href|src)=")(/[^"]*)')
+
+# Site-absolute url -> fingerprinted url, filled in by the static asset stage.
+ASSET_URLS = {}
+
+
+def register_asset_urls(urls):
+    ASSET_URLS.clear()
+    ASSET_URLS.update(urls)
+
+
+def rewrite_basepath(text, basepath="/"):
+    return SITE_URL_ATTRIBUTE_PATTERN.sub(
+        lambda match: match.group(1) + rewrite_url(match.group(2), basepath), text
+    )
+
+
+def rewrite_url(url, basepath="/"):
+    if not url.startswith("/"):
+        return url
+    if ASSET_URLS:
+        end = len(url)
+        for marker in "?#":
+            position = url.find(marker)
+            if position != -1:
+                end = min(end, position)
+        url = ASSET_URLS.get(url[:end], url[:end]) + url[end:]
+    return basepath + url[1:]
+
+
+def rewrite_srcset(srcset, basepath="/"):
+    candidates = []
+    for candidate in srcset.split(","):
+        url, _, descriptor = candidate.strip().partition(" ")
+        candidates.append(f"{rewrite_url(url, basepath)} {descriptor}".rstrip())
+    return ", ".join(candidates)
+
+
+class Template:
+    def __init__(self, source, basepath="/", path=None):
+        self.path = path
+        self.basepath = basepath
+        self.literals = []
+        self.slots = []
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(source):
+            self.literals.append(rewrite_basepath(source[position:match.start()], basepath))
+            self.slots.append((match.group(1), match.group(0)))
+            position = match.end()
+        self.literals.append(rewrite_basepath(source[position:], basepath))
+
+    def iter_render(self, values):
+        yield self.literals[0]
+        for (name, placeholder), literal in zip(self.slots, self.literals[1:]):
+            value = values.get(name, placeholder)
+            if isinstance(value, str):
+                yield value
+            else:
+                yield from value
+            yield literal
+
+    def render(self, values):
+        return "".join(self.iter_render(values))
+
+    def __repr__(self):
+        return f"Template({self.path}, slots: {[name for name, _ in self.slots]}, {self.basepath})"
+
+
+def load_template(template_path, basepath="/"):
+    with open(template_path, 'r') as f:
+        return Template(f.read(), basepath, template_path)
+
+
+# {{> name }} pulls in templates/<name>.html when a layout is compiled.
+INCLUDE_PATTERN = re.compile(r"\{\{> ([\w./-]+) \}\}")
+TEMPLATE_SUFFIX = ".html"
+
+
+class TemplateRegistry:
+    def __init__(self, default_path, template_dir=None, content_dir=None, basepath="/"):
+        self.default_path = default_path
+        self.template_dir = template_dir
+        self.content_dir = content_dir
+        self.basepath = basepath
+        self.sources = {}
+        self.templates = {}
+        self.default = self._compile(default_path)
+        if template_dir is not None and os.path.isdir(template_dir):
+            for entry in walk_tree(template_dir, template_dir):
+                if entry.source.endswith(TEMPLATE_SUFFIX):
+                    name = os.path.relpath(entry.source, template_dir)[:-len(TEMPLATE_SUFFIX)]
+                    self.templates[name.replace(os.sep, "/")] = self._compile(entry.source)
+
+    def _read(self, path):
+        source = self.sources.get(path)
+        if source is None:
+            with open(path, 'r') as f:
+                source = self.sources[path] = f.read()
+        return source
+
+    def _include_path(self, name):
+        if self.template_dir is None:
+            raise ValueError(f"Cannot include {name}: no template directory")
+        if not name.endswith(TEMPLATE_SUFFIX):
+            name += TEMPLATE_SUFFIX
+        return os.path.join(self.template_dir, name)
+
+    def expand(self, path, including=()):
+        if path in including:
+            chain = " -> ".join(including + (path,))
+            raise ValueError(f"Template include cycle: {chain}")
+
+        def include(match):
+            return self.expand(self._include_path(match.group(1)), including + (path,))
+
+        return INCLUDE_PATTERN.sub(include, self._read(path))
+
+    def compile(self):
+        # Templates are recompiled from the loaded sources when asset urls change.
+        self.default = self._compile(self.default_path)
+        for name in self.templates:
+            self.templates[name] = self._compile(self.templates[name].path)
+
+    def _compile(self, path):
+        return Template(self.expand(path), self.basepath, path)
+
+    def get(self, name):
+        template = self.templates.get(name)
+        if template is None:
+            raise ValueError(f"Unknown template: {name}")
+        return template
+
+    def template_for(self, page_path, front_matter=None):
+        if front_matter and front_matter.get("template"):
+            return self.get(front_matter["template"])
+        if self.templates:
+            if self.content_dir is not None:
+                page_path = os.path.relpath(page_path, self.content_dir)
+            # The nearest enclosing section with a layout of its own wins.
+            section = os.path.dirname(page_path).replace(os.sep, "/")
+            while section:
+                template = self.templates.get(section)
+                if template is not None:
+                    return template
+                section = section.rpartition("/")[0]
+        return self.default
+
+    def fingerprint(self):
+        digest = hashlib.sha256()
+        for path in sorted(self.sources):
+            digest.update(f"{path}\0{self.sources[path]}\0".encode())
+        return digest.hexdigest()
+
+
+def select_template(templates, page_path, front_matter=None):
+    if isinstance(templates, TemplateRegistry):
+        return templates.template_for(page_path, front_matter)
+    return templates
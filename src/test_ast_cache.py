@@ -0,0 +1,71 @@
+import tempfile
+import unittest
+
+from ast_cache import AstCache, ast_key, decode_tree, encode_tree
+from block_markdown import markdown_to_html_node
+from build_context import BuildContext
+from htmlnode import LeafNode, ParentNode
+from page_generator import parse_page
+from textnode import TEXT_NODE_BUILDERS, TextType, register_text_type
+
+MARKDOWN = """# Title
+
+Some **bold** and [a link](/blog/post) with ![img](/images/a.png).
+
+- one
+- two
+
+```
+code
+```
+"""
+
+
+class TestAstEncoding(unittest.TestCase):
+    def test_round_trip(self):
+        node = markdown_to_html_node(MARKDOWN)
+        self.assertEqual(decode_tree(encode_tree(node)).to_html(), node.to_html())
+
+    def test_basepath_applied_on_decode(self):
+        data = encode_tree(markdown_to_html_node(MARKDOWN))
+        self.assertEqual(
+            decode_tree(data, "/site/").to_html(),
+            markdown_to_html_node(MARKDOWN, "/site/").to_html(),
+        )
+
+    def test_empty_parent_and_tuple_props(self):
+        node = ParentNode("div", [ParentNode("span", []), LeafNode("a", "x", (("href", "/"),))])
+        self.assertEqual(decode_tree(encode_tree(node)).to_html(), node.to_html())
+
+    def test_rejects_foreign_data(self):
+        with self.assertRaises(ValueError):
+            decode_tree(b"NOTAST" + bytes(20))
+
+
+class TestAstCache(unittest.TestCase):
+    def test_miss_then_hit(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = AstCache(directory)
+            key = ast_key(MARKDOWN)
+            self.assertIsNone(cache.get(key))
+            cache.put(key, markdown_to_html_node(MARKDOWN))
+            node = AstCache(directory).get(key, "/site/")
+            self.assertIn('href="/site/blog/post"', node.to_html())
+            self.assertEqual((cache.hits, cache.misses), (0, 1))
+
+    def test_key_depends_on_content(self):
+        self.assertNotEqual(ast_key("a"), ast_key("b"))
+
+    def test_registered_builders_invalidate_cached_trees(self):
+        with tempfile.TemporaryDirectory() as directory:
+            context = BuildContext(ast_cache=AstCache(directory))
+            parse_page("Some **bold** text", context=context)
+            self.addCleanup(register_text_type, TextType.BOLD, TEXT_NODE_BUILDERS[TextType.BOLD])
+            register_text_type(TextType.BOLD, lambda node, basepath: LeafNode("strong", node.text))
+            node = parse_page("Some **bold** text", context=context)
+            self.assertEqual(node.to_html(), "<div><p>Some <strong>bold</strong> text</p></div>")
+            self.assertEqual(context.ast_cache.hits, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
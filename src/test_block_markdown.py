@@ -1,5 +1,18 @@
 import unittest
-from block_markdown import markdown_to_blocks, block_to_block_type, BlockType
+from block_markdown import (
+    markdown_to_blocks,
+    block_to_block_type,
+    markdown_to_html_node,
+    scan_blocks,
+    register_block_type,
+    BLOCK_BUILDERS,
+    BLOCK_DETECTORS,
+    BLOCK_INLINE_TEXTS,
+    BlockType,
+    block_text_nodes,
+)
+from htmlnode import ParentNode, LeafNode
+from textnode import TextNode, TextType
 
 class TestMarkdownToBlocks(unittest.TestCase):
     def test_markdown_to_blocks(self):
@@ -81,6 +94,59 @@ A block that ends with spaces.
         blocks = markdown_to_blocks(md)
         self.assertListEqual(blocks, [])
 
+    def test_code_block_with_blank_lines(self):
+        md = """
+Intro paragraph
+
+```
+def a():
+    pass
+
+
+def b():
+    pass
+```
+
+After the code
+"""
+        blocks = markdown_to_blocks(md)
+        self.assertListEqual(
+            blocks,
+            [
+                "Intro paragraph",
+                "```\ndef a():\n    pass\n\n\ndef b():\n    pass\n```",
+                "After the code",
+            ],
+        )
+
+    def test_scan_blocks_classifies_and_splits_lines(self):
+        md = "# Title\n\n- a\n- b\n\n```\nx\n\ny\n```"
+        self.assertListEqual(
+            list(scan_blocks(md)),
+            [
+                (BlockType.HEADING, ["# Title"]),
+                (BlockType.UNORDERED_LIST, ["- a", "- b"]),
+                (BlockType.CODE, ["```", "x", "", "y", "```"]),
+            ],
+        )
+
+    def test_unclosed_fence_is_paragraph(self):
+        md = "```not code\n\nnext"
+        self.assertListEqual(
+            list(scan_blocks(md)),
+            [
+                (BlockType.PARAGRAPH, ["```not code"]),
+                (BlockType.PARAGRAPH, ["next"]),
+            ],
+        )
+
+    def test_code_block_html_keeps_blank_lines(self):
+        md = "```\nfirst\n\nsecond\n```"
+        self.assertEqual(
+            markdown_to_html_node(md).to_html(),
+            "<div><pre><code>first\n\nsecond\n</code></pre></div>",
+        )
+
 
 class TestBlockToBlockType(unittest.TestCase):
     def test_heading(self):
@@ -125,5 +191,49 @@ class TestBlockToBlockType(unittest.TestCase):
         self.assertEqual(block_to_block_type("Just a normal paragraph."), BlockType.PARAGRAPH)
         self.assertEqual(block_to_block_type("Another paragraph\nwith two lines."), BlockType.PARAGRAPH)
 
+class TestBlockTextNodes(unittest.TestCase):
+    def test_list_items_and_code(self):
+        self.assertEqual(
+            block_text_nodes(BlockType.ORDERED_LIST, ["1. **a**", "2. b"]),
+            [TextNode("a", TextType.BOLD), TextNode("b", TextType.TEXT)],
+        )
+        self.assertEqual(block_text_nodes(BlockType.CODE, ["```", "[x](/y)", "```"]), [])
+
+class TestRegisterBlockType(unittest.TestCase):
+    def tearDown(self):
+        BLOCK_BUILDERS.pop("admonition", None)
+        BLOCK_INLINE_TEXTS.pop("admonition", None)
+        BLOCK_DETECTORS.clear()
+
+    def test_custom_block_type(self):
+        register_block_type(
+            "admonition",
+            lambda lines, basepath: ParentNode("aside", [LeafNode(None, lines[0][3:])]),
+            lambda lines: lines[0].startswith("!! "),
+        )
+        md = "!! Careful now\n\nplain"
+        self.assertEqual(
+            markdown_to_html_node(md).to_html(),
+            "<div><aside>Careful now</aside><p>plain</p></div>",
+        )
+
+    def test_custom_block_inline_text_nodes(self):
+        self.assertEqual(block_text_nodes("admonition", ["!! [x](/y)"]), [])
+        register_block_type(
+            "admonition",
+            lambda lines, basepath: ParentNode("aside", []),
+            inline_texts=lambda lines: [lines[0][3:]],
+        )
+        self.assertEqual(
+            block_text_nodes("admonition", ["!! [x](/y)"]),
+            [TextNode("x", TextType.LINK, "/y")],
+        )
+
+    def test_unknown_block_type_raises(self):
+        BLOCK_DETECTORS.append((lambda lines: True, "missing"))
+        with self.assertRaises(ValueError):
+            markdown_to_html_node("anything")
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,130 @@
+import os
+import tempfile
+import time
+import unittest
+
+from copystatic import copy_files_recursive, fingerprint_static, sync_files_recursive
+from manifest import BuildManifest
+from template import register_asset_urls, rewrite_url
+
+
+class TestSyncFiles(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.docs = os.path.join(self.tmp.name, "docs")
+        os.makedirs(os.path.join(self.static, "images"))
+        for path, text in [("index.css", "body {}"), ("images/a.png", "png")]:
+            with open(os.path.join(self.static, path), 'w') as f:
+                f.write(text)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_copy_then_skip_unchanged(self):
+        first = sync_files_recursive(self.static, self.docs, mode="copy")
+        self.assertEqual(first["copied"], 2)
+        second = sync_files_recursive(self.static, self.docs, mode="copy")
+        self.assertEqual(second["skipped"], 2)
+        with open(os.path.join(self.docs, "images", "a.png")) as f:
+            self.assertEqual(f.read(), "png")
+
+    def test_changed_file_is_recopied(self):
+        sync_files_recursive(self.static, self.docs, mode="copy")
+        with open(os.path.join(self.static, "index.css"), 'w') as f:
+            f.write("body { color: red; }")
+        stats = sync_files_recursive(self.static, self.docs, mode="copy")
+        self.assertEqual((stats["copied"], stats["skipped"]), (1, 1))
+
+    def test_hardlink_mode(self):
+        stats = sync_files_recursive(self.static, self.docs, mode="hardlink")
+        self.assertEqual(stats["hardlinked"], 2)
+        self.assertTrue(
+            os.path.samefile(
+                os.path.join(self.static, "index.css"), os.path.join(self.docs, "index.css")
+            )
+        )
+
+    def test_stale_files_removed_through_manifest(self):
+        manifest_path = os.path.join(self.tmp.name, "manifest.json")
+        manifest = BuildManifest(manifest_path, "t", "/")
+        sync_files_recursive(self.static, self.docs, manifest, mode="copy")
+        manifest.save()
+        os.remove(os.path.join(self.static, "images", "a.png"))
+        manifest = BuildManifest(manifest_path, "t", "/")
+        sync_files_recursive(self.static, self.docs, manifest, mode="copy")
+        manifest.remove_stale()
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "images", "a.png")))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "index.css")))
+
+    def test_copy_after_hardlink_sync(self):
+        manifest_path = os.path.join(self.tmp.name, "manifest.json")
+        manifest = BuildManifest(manifest_path, "t", "/")
+        sync_files_recursive(self.static, self.docs, manifest, mode="hardlink")
+        manifest.save()
+        source = os.path.join(self.static, "index.css")
+        dest = os.path.join(self.docs, "index.css")
+        with open(source, 'a') as f:
+            f.write(" p {}")
+        os.utime(source, ns=(time.time_ns() + 1_000_000_000,) * 2)
+        copy_files_recursive(self.static, self.docs, BuildManifest(manifest_path, "t", "/"))
+        self.assertFalse(os.path.samefile(source, dest))
+        with open(dest) as f:
+            self.assertEqual(f.read(), "body {} p {}")
+        with open(source) as f:
+            self.assertEqual(f.read(), "body {} p {}")
+
+
+class TestFingerprintStatic(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.docs = os.path.join(self.tmp.name, "docs")
+        self.manifest_path = os.path.join(self.tmp.name, "manifest.json")
+        os.makedirs(os.path.join(self.static, "images"))
+        self.write("index.css", "body {}")
+        self.write("images/a.png", "png")
+        self.addCleanup(register_asset_urls, {})
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(os.path.join(self.static, path), 'w') as f:
+            f.write(text)
+
+    def build(self):
+        manifest = BuildManifest(self.manifest_path, "t", "/")
+        copy_files_recursive(self.static, self.docs, manifest)
+        assets = fingerprint_static(self.static, self.docs, manifest)
+        manifest.remove_stale()
+        manifest.save()
+        return assets
+
+    def test_hashed_copies_and_url_rewriting(self):
+        assets = self.build()
+        hashed = assets.urls["/index.css"]
+        self.assertRegex(hashed, r"^/index\.[0-9a-f]{10}\.css$")
+        with open(os.path.join(self.docs, hashed[1:])) as f:
+            self.assertEqual(f.read(), "body {}")
+        assets.install()
+        self.assertEqual(rewrite_url("/index.css?v=1", "/site/"), "/site" + hashed + "?v=1")
+        self.assertEqual(rewrite_url("/other.css", "/site/"), "/site/other.css")
+
+    def test_unchanged_files_reuse_hashes(self):
+        first = self.build()
+        second = self.build()
+        self.assertEqual(second.urls, first.urls)
+        self.assertEqual((second.hashed, second.reused, second.written), (0, 2, 0))
+
+    def test_changed_file_replaces_old_copy(self):
+        old = self.build().urls["/index.css"]
+        self.write("index.css", "body { color: red; }")
+        new = self.build().urls["/index.css"]
+        self.assertNotEqual(new, old)
+        self.assertTrue(os.path.exists(os.path.join(self.docs, new[1:])))
+        self.assertFalse(os.path.exists(os.path.join(self.docs, old[1:])))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,4 @@
+import io
 import unittest
 from htmlnode import HTMLNode, LeafNode, ParentNode
 
@@ -18,6 +19,15 @@ class TestHTMLNode(unittest.TestCase):
         node = HTMLNode(props=None)
         self.assertEqual(node.props_to_html(), "")
 
+    def test_props_to_html_tuple(self):
+        props = (("href", "https://www.google.com"), ("target", "_blank"))
+        node = LeafNode("a", "Google", props)
+        self.assertEqual(node.to_html(), '<a href="https://www.google.com" target="_blank">Google</a>')
+
+    def test_nodes_have_no_instance_dict(self):
+        self.assertFalse(hasattr(LeafNode("p", "x"), "__dict__"))
+        self.assertFalse(hasattr(ParentNode("p", []), "__dict__"))
+
     def test_repr(self):
         node = HTMLNode("p", "Hello", [], {"class": "my-class"})
         expected_repr = "HTMLNode(tag=p, value=Hello, children=[], props={'class': 'my-class'})"
@@ -84,6 +94,23 @@ class TestHTMLNode(unittest.TestCase):
             "<h2><b>Bold text</b>Normal text<i>italic text</i>Normal text</h2>",
         )
 
+    def test_iter_html_chunks(self):
+        node = ParentNode("p", [LeafNode("b", "Bold"), LeafNode(None, " text")])
+        self.assertEqual(list(node.iter_html()), ["<p>", "<b>Bold</b>", " text", "</p>"])
+
+    def test_write_html_matches_to_html(self):
+        node = ParentNode(
+            "div",
+            [ParentNode("span", [LeafNode("i", "deep")]), LeafNode("a", "x", {"href": "/"})],
+        )
+        buffer = io.StringIO()
+        node.write_html(buffer)
+        self.assertEqual(buffer.getvalue(), node.to_html())
+
+    def test_iter_html_no_children(self):
+        with self.assertRaises(ValueError):
+            list(ParentNode("div", None).iter_html())
+
 
 if __name__ == "__main__":
     unittest.main()
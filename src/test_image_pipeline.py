@@ -0,0 +1,116 @@
+import os
+import struct
+import tempfile
+import unittest
+import zlib
+
+from ast_cache import decode_tree, encode_tree
+from build_context import BuildContext
+from image_pipeline import ImagePipeline
+from manifest import BuildManifest
+from png_codec import PNG_SIGNATURE, read_png, read_png_size, resize_rows, write_png
+from textnode import TextNode, TextType, text_node_to_html_node
+
+
+def gradient_rows(width, height):
+    return [bytearray((x * 8 + y) % 256 for x in range(width) for _ in range(3)) for y in range(height)]
+
+
+class TestPngCodec(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "a.png")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        rows = gradient_rows(7, 5)
+        write_png(self.path, 7, 5, 2, rows)
+        self.assertEqual(read_png_size(self.path), (7, 5))
+        self.assertEqual(read_png(self.path), (7, 5, 2, rows))
+
+    def test_filtered_rows_are_decoded(self):
+        # Sub-filtered first row, Paeth-filtered second row of a 2x2 grayscale image.
+        raw = bytes(b & 0xFF for b in [1, 10, 5, 4, 10, (7 - 20) & 0xFF])
+        header = struct.pack(">IIBBBBB", 2, 2, 8, 0, 0, 0, 0)
+
+        def chunk(kind, body):
+            return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+
+        with open(self.path, 'wb') as f:
+            f.write(PNG_SIGNATURE + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b""))
+        _, _, _, rows = read_png(self.path)
+        self.assertEqual([list(row) for row in rows], [[10, 15], [20, 7]])
+
+    def test_resize_averages_covered_pixels(self):
+        rows = [bytearray([0, 100, 200, 100]), bytearray([100, 200, 100, 0])]
+        self.assertEqual(resize_rows(rows, 4, 2, 1, 2, 1), [bytearray([100, 100])])
+
+
+class TestImagePipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.docs = os.path.join(self.tmp.name, "docs")
+        self.cache = os.path.join(self.tmp.name, "cache")
+        os.makedirs(os.path.join(self.static, "images"))
+        os.makedirs(os.path.join(self.docs, "images"))
+        write_png(os.path.join(self.static, "images", "hero.png"), 40, 20, 2, gradient_rows(40, 20))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def process(self):
+        pipeline = ImagePipeline(self.cache, (10, 20, 80), "python", jobs=1)
+        return pipeline, pipeline.process(self.static, self.docs)
+
+    def test_variants_are_generated_then_cached(self):
+        pipeline, index = self.process()
+        self.assertEqual(pipeline.generated, 1)
+        self.assertEqual(
+            index.entries["/images/hero.png"],
+            {
+                "width": 40,
+                "height": 20,
+                "srcset": [("/images/hero-10w.png", 10), ("/images/hero-20w.png", 20), ("/images/hero.png", 40)],
+            },
+        )
+        self.assertEqual(read_png_size(os.path.join(self.docs, "images", "hero-20w.png")), (20, 10))
+
+        pipeline, cached = self.process()
+        self.assertEqual((pipeline.generated, pipeline.cached, pipeline.placed), (0, 1, 0))
+        self.assertEqual(cached.fingerprint(), index.fingerprint())
+
+    def test_image_node_gets_dimensions_and_srcset(self):
+        _, index = self.process()
+        expected = (
+            '<img src="/site/images/hero.png" alt="hero" width="40" height="20" '
+            'srcset="/site/images/hero-10w.png 10w, /site/images/hero-20w.png 20w, /site/images/hero.png 40w"></img>'
+        )
+        with BuildContext(images=index).rendering():
+            node = text_node_to_html_node(TextNode("hero", TextType.IMAGE, "/images/hero.png"), "/site/")
+            self.assertEqual(node.to_html(), expected)
+            other = text_node_to_html_node(TextNode("x", TextType.IMAGE, "/other.png"))
+            self.assertEqual(other.to_html(), '<img src="/other.png" alt="x"></img>')
+
+            # Cached trees are basepath-neutral; srcset urls are rewritten on load too.
+            neutral = text_node_to_html_node(TextNode("hero", TextType.IMAGE, "/images/hero.png"))
+            self.assertEqual(decode_tree(encode_tree(neutral), "/site/").to_html(), expected)
+
+        # Outside a build that uses the index, images render plainly again.
+        plain = text_node_to_html_node(TextNode("hero", TextType.IMAGE, "/images/hero.png"))
+        self.assertEqual(plain.to_html(), '<img src="/images/hero.png" alt="hero"></img>')
+
+    def test_variants_have_their_own_manifest_section(self):
+        manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"), "t", "/")
+        ImagePipeline(self.cache, (10, 20, 80), "python", jobs=1).process(self.static, self.docs, manifest)
+        self.assertEqual(manifest.current["static"], {})
+        self.assertEqual(
+            sorted(manifest.current["variants"]),
+            [os.path.join(self.docs, "images", f"hero-{width}w.png") for width in (10, 20)],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
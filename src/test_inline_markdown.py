@@ -6,8 +6,11 @@ from inline_markdown import (
     split_nodes_image,
     split_nodes_link,
     text_to_textnodes,
+    register_inline_delimiter,
 )
-from textnode import TextNode, TextType
+import inline_markdown
+from textnode import TextNode, TextType, TEXT_NODE_BUILDERS, register_text_type, text_node_to_html_node
+from htmlnode import LeafNode
 
 class TestSplitNodesDelimiter(unittest.TestCase):
     def test_empty_input_list(self):
@@ -373,6 +376,62 @@ class TestTextToTextNodes(unittest.TestCase):
         with self.assertRaises(ValueError):
             text_to_textnodes(text)
 
+    def test_link_url_with_underscores(self):
+        text = "Read [the docs](https://example.com/some_page_name) _now_"
+        nodes = text_to_textnodes(text)
+        expected = [
+            TextNode("Read ", TextType.TEXT),
+            TextNode("the docs", TextType.LINK, "https://example.com/some_page_name"),
+            TextNode(" ", TextType.TEXT),
+            TextNode("now", TextType.ITALIC),
+        ]
+        self.assertListEqual(nodes, expected)
+
+    def test_lone_asterisk_is_literal(self):
+        text = "Compute 2 * 3 for **fun**"
+        nodes = text_to_textnodes(text)
+        expected = [
+            TextNode("Compute 2 * 3 for ", TextType.TEXT),
+            TextNode("fun", TextType.BOLD),
+        ]
+        self.assertListEqual(nodes, expected)
+
+    def test_unmatched_asterisk_is_literal(self):
+        for text in ("Compute 2 *3 apples", "a * b *c", "see *x"):
+            self.assertListEqual(text_to_textnodes(text), [TextNode(text, TextType.TEXT)])
+
+    def test_unmatched_asterisk_before_emphasis(self):
+        nodes = text_to_textnodes("see *x and _this_")
+        expected = [
+            TextNode("see *x and ", TextType.TEXT),
+            TextNode("this", TextType.ITALIC),
+        ]
+        self.assertListEqual(nodes, expected)
+
+
+class TestRegisterInlineDelimiter(unittest.TestCase):
+    def setUp(self):
+        self.saved = inline_markdown.INLINE_DELIMITERS
+
+    def tearDown(self):
+        inline_markdown.INLINE_DELIMITERS = self.saved
+        TEXT_NODE_BUILDERS.pop("strike", None)
+
+    def test_custom_delimiter_and_builder(self):
+        register_inline_delimiter("~~", "strike")
+        register_text_type("strike", lambda node, basepath: LeafNode("s", node.text))
+        nodes = text_to_textnodes("a ~~gone~~ **b**")
+        self.assertListEqual(
+            nodes,
+            [
+                TextNode("a ", TextType.TEXT),
+                TextNode("gone", "strike"),
+                TextNode(" ", TextType.TEXT),
+                TextNode("b", TextType.BOLD),
+            ],
+        )
+        self.assertEqual(text_node_to_html_node(nodes[1]).to_html(), "<s>gone</s>")
+
 
 if __name__ == "__main__":
     unittest.main()
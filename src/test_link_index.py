@@ -0,0 +1,109 @@
+import os
+import tempfile
+import unittest
+
+from ast_cache import AstCache
+from build_context import BuildContext
+from link_index import LinkIndex, resolve_target
+from manifest import BuildManifest, file_hash
+from page_generator import generate_pages_recursive
+
+
+class TestResolveTarget(unittest.TestCase):
+    def test_absolute_and_relative(self):
+        self.assertEqual(resolve_target("/blog/tom", "/contact/"), "blog/tom")
+        self.assertEqual(resolve_target("../tom/#top", "/blog/majesty/"), "blog/tom")
+        self.assertEqual(resolve_target("/", "/blog/tom/"), "")
+        self.assertEqual(resolve_target("pic.png?v=2", "/blog/tom/"), "blog/tom/pic.png")
+
+
+class MergeCountingLinkIndex(LinkIndex):
+    def __init__(self):
+        super().__init__()
+        self.merged = []
+
+    def merge(self, pages):
+        self.merged.extend(pages)
+        super().merge(pages)
+
+
+class TestLinkIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.docs = os.path.join(root, "docs")
+        self.template = os.path.join(root, "template.html")
+        self.manifest_path = os.path.join(root, "manifest.json")
+        os.makedirs(os.path.join(self.content, "blog"))
+        os.makedirs(os.path.join(self.docs, "images"))
+        self.write(os.path.join(self.docs, "images", "a.png"), "png")
+        self.write(
+            os.path.join(self.content, "index.md"),
+            "# Home\n\n[Post](/blog/post) and [gone](/blog/gone) but `[code](/nowhere)`\n\n```\n[not a link](/nowhere)\n```",
+        )
+        self.write(
+            os.path.join(self.content, "blog", "post.md"),
+            "# Post\n\n![a](/images/a.png) ![b](/images/b.png) [ext](https://boot.dev) [self](post.html)",
+        )
+        self.write(os.path.join(self.content, "blog", "lonely.md"), "# Lonely\n\n[Home](/)")
+        self.write(self.template, "{{ Content }}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def build(self, jobs=1):
+        manifest = BuildManifest(self.manifest_path, file_hash(self.template), "/")
+        manifest.record("static", "a.png", "1", os.path.join(self.docs, "images", "a.png"))
+        context = BuildContext(link_index=LinkIndex())
+        generate_pages_recursive(self.content, self.template, self.docs, "/", manifest, jobs, context)
+        manifest.save()
+        return manifest, context.link_index.check(manifest.outputs(), self.docs)
+
+    def test_broken_links_and_orphans(self):
+        _, report = self.build()
+        self.assertEqual(report.checked, 6)
+        self.assertEqual(
+            [(os.path.basename(source), kind, url) for source, kind, url in report.broken],
+            [("post.md", "image", "/images/b.png"), ("index.md", "link", "/blog/gone")],
+        )
+        self.assertEqual([os.path.basename(source) for source in report.orphans], ["lonely.md"])
+
+    def test_ast_cache_hits_collect_the_same_links(self):
+        cache_dir = os.path.join(self.tmp.name, "ast")
+        for _ in range(2):
+            manifest = BuildManifest(self.manifest_path, file_hash(self.template), "/", fresh=True)
+            context = BuildContext(ast_cache=AstCache(cache_dir), link_index=LinkIndex())
+            generate_pages_recursive(self.content, self.template, self.docs, "/", manifest, 1, context)
+            report = context.link_index.check(manifest.outputs(), self.docs)
+            self.assertEqual((report.checked, len(report.broken)), (6, 3))
+        self.assertEqual(context.ast_cache.hits, 3)
+
+    def test_parallel_build_collects_links(self):
+        _, report = self.build(jobs=2)
+        self.assertEqual(len(report.broken), 2)
+
+    def test_incremental_build_reuses_stored_links(self):
+        self.build()
+        manifest, report = self.build()
+        self.assertEqual(manifest.skipped, 3)
+        self.assertEqual(len(report.broken), 2)
+        self.assertEqual(len(report.orphans), 1)
+
+    def test_workers_return_only_their_own_pages(self):
+        self.build()
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n[Post](/blog/post)")
+        self.write(os.path.join(self.content, "blog", "lonely.md"), "# Lonely\n\n[Gone](/blog/gone)")
+        manifest = BuildManifest(self.manifest_path, file_hash(self.template), "/")
+        context = BuildContext(link_index=MergeCountingLinkIndex())
+        generate_pages_recursive(self.content, self.template, self.docs, "/", manifest, 2, context)
+        self.assertEqual(sorted(map(os.path.basename, context.link_index.merged)), ["index.md", "lonely.md"])
+        self.assertEqual(len(context.link_index.pages), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from main import main, parse_args
+from png_codec import write_png
+from template import register_asset_urls
+
+
+class TestParseArgs(unittest.TestCase):
+    def test_io_threads_and_jobs_are_exclusive(self):
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            parse_args(["--jobs", "2", "--io-threads", "4"])
+
+
+class TestIncrementalRenderInputs(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.addCleanup(os.chdir, cwd)
+        self.addCleanup(register_asset_urls, {})
+        os.makedirs("static")
+        os.makedirs("content")
+        with open(os.path.join("static", "index.css"), 'w') as f:
+            f.write("body {}")
+        os.makedirs(os.path.join("static", "images"))
+        write_png(os.path.join("static", "images", "wide.png"), 600, 2, 0, [bytearray(600)] * 2)
+        with open(os.path.join("content", "index.md"), 'w') as f:
+            f.write("# Home")
+        with open("template.html", 'w') as f:
+            f.write('<link href="/index.css">{{ Content }}')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, *argv):
+        with contextlib.redirect_stdout(io.StringIO()):
+            main(["--incremental", *argv])
+        with open(os.path.join("docs", "index.html")) as f:
+            return f.read()
+
+    def test_disabling_fingerprints_rebuilds_pages(self):
+        html = self.build("--fingerprint-assets")
+        self.assertRegex(html, r'href="/index\.[0-9a-f]{10}\.css"')
+        self.assertEqual(self.build(), '<link href="/index.css"><div><h1>Home</h1></div>')
+
+    def test_disabling_images_rebuilds_pages(self):
+        with open(os.path.join("content", "index.md"), 'a') as f:
+            f.write("\n\n![wide](/images/wide.png)")
+        self.assertIn("/images/wide-480w.png 480w", self.build("--images"))
+        html = self.build()
+        self.assertNotIn("srcset", html)
+        self.assertFalse(os.path.exists(os.path.join("docs", "images", "wide-480w.png")))
+
+
+    def test_disabling_precompression_drops_siblings(self):
+        with open(os.path.join("content", "index.md"), 'a') as f:
+            f.write("\n\n" + "padding " * 200)
+        with open(os.path.join("content", "gone.md"), 'w') as f:
+            f.write("# Gone " + "padding " * 200)
+        self.build("--precompress")
+        self.assertTrue(os.path.exists(os.path.join("docs", "index.html.gz")))
+        self.assertTrue(os.path.exists(os.path.join("docs", "gone.html.gz")))
+        with open(os.path.join("content", "index.md"), 'a') as f:
+            f.write("\n\nEdited")
+        os.remove(os.path.join("content", "gone.md"))
+        self.assertIn("Edited", self.build())
+        self.assertEqual(sorted(os.listdir("docs")), ["images", "index.css", "index.html"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+
+from manifest import BuildManifest, file_hash
+from page_generator import generate_pages_recursive
+
+
+class TestBuildManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.docs = os.path.join(root, "docs")
+        self.template = os.path.join(root, "template.html")
+        self.manifest_path = os.path.join(root, "manifest.json")
+        os.makedirs(os.path.join(self.content, "blog"))
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome")
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n\nHello")
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def build(self, basepath="/"):
+        manifest = BuildManifest(self.manifest_path, file_hash(self.template), basepath)
+        generate_pages_recursive(self.content, self.template, self.docs, basepath, manifest)
+        manifest.remove_stale()
+        manifest.save()
+        return manifest
+
+    def test_unchanged_pages_are_skipped(self):
+        self.assertEqual(self.build().skipped, 0)
+        self.assertEqual(self.build().skipped, 2)
+
+    def test_changed_source_is_rebuilt(self):
+        self.build()
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nChanged")
+        self.assertEqual(self.build().skipped, 1)
+        with open(os.path.join(self.docs, "index.html")) as f:
+            self.assertIn("Changed", f.read())
+
+    def test_template_change_rebuilds_everything(self):
+        self.build()
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.assertEqual(self.build().skipped, 0)
+
+    def test_basepath_change_rebuilds_everything(self):
+        self.build()
+        self.assertEqual(self.build("/site/").skipped, 0)
+
+    def test_removed_source_deletes_output(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        self.build()
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog", "post.html")))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "index.html")))
+
+
+if __name__ == "__main__":
+    unittest.main()
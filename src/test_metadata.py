@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+
+from metadata import page_url, read_front_matter, read_page_metadata, split_front_matter
+
+
+class TestSplitFrontMatter(unittest.TestCase):
+    def test_yaml(self):
+        md = "---\ntitle: \"Hello\"\ndate: 2024-01-02\n---\n# Heading\n\nBody"
+        front_matter, body = split_front_matter(md)
+        self.assertEqual(front_matter, {"title": "Hello", "date": "2024-01-02"})
+        self.assertEqual(body, "# Heading\n\nBody")
+
+    def test_toml(self):
+        md = "+++\ntitle = 'Hi'\n+++\nBody"
+        self.assertEqual(split_front_matter(md), ({"title": "Hi"}, "Body"))
+
+    def test_no_front_matter(self):
+        md = "# Heading\n---\n"
+        self.assertEqual(split_front_matter(md), ({}, md))
+
+    def test_unclosed_front_matter_is_body(self):
+        md = "---\ntitle: x\n"
+        self.assertEqual(split_front_matter(md), ({}, md))
+
+    def test_streaming_and_in_memory_split_agree(self):
+        for md in [
+            "---\ntitle: x\n---\nBody",
+            "---  \ntitle: x\n---\t\nBody\n---\nmore",
+            "---\ntitle: x\n---x\nBody",
+            "---\ntitle: x\n",
+            "+++\ntitle = 'é'\n+++\n# Hé\n",
+            "---\n---\n",
+            "# Heading\n---\n",
+            "",
+        ]:
+            lines = iter(md.splitlines(keepends=True))
+            front_matter, pending = read_front_matter(lines)
+            streamed = (front_matter, "".join(pending) + "".join(lines))
+            self.assertEqual(split_front_matter(md), streamed, md)
+
+
+class TestReadPageMetadata(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, text):
+        path = os.path.join(self.tmp.name, "page.md")
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def test_title_from_first_h1(self):
+        path = self.write("Intro\n\n# The Title\n\n## Sub\n")
+        self.assertEqual(read_page_metadata(path).title, "The Title")
+
+    def test_front_matter_title_and_date(self):
+        path = self.write("---\ntitle: From Front Matter\ndate: 2024-05-01\n---\n# Ignored\n")
+        metadata = read_page_metadata(path, "/page/")
+        self.assertEqual(metadata.title, "From Front Matter")
+        self.assertEqual(metadata.date, "2024-05-01")
+        self.assertEqual(metadata.url, "/page/")
+
+    def test_h1_on_first_line(self):
+        path = self.write("# Top\nbody")
+        self.assertEqual(read_page_metadata(path).title, "Top")
+
+    def test_page_url(self):
+        self.assertEqual(page_url("docs/index.html", "docs"), "/")
+        self.assertEqual(page_url("docs/blog/tom/index.html", "docs"), "/blog/tom/")
+        self.assertEqual(page_url("docs/about.html", "docs"), "/about.html")
+
+
+if __name__ == "__main__":
+    unittest.main()
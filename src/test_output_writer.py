@@ -0,0 +1,59 @@
+import os
+import stat
+import tempfile
+import unittest
+
+from output_writer import stream_if_changed, write_if_changed
+
+
+class TestOutputWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "index.html")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self):
+        with open(self.path) as f:
+            return f.read()
+
+    def test_new_file_is_written(self):
+        self.assertTrue(write_if_changed(self.path, "<p>hi</p>"))
+        self.assertEqual(self.read(), "<p>hi</p>")
+
+    def test_identical_output_leaves_file_untouched(self):
+        write_if_changed(self.path, "<p>hi</p>")
+        os.utime(self.path, ns=(1, 1))
+        self.assertFalse(write_if_changed(self.path, "<p>hi</p>"))
+        self.assertFalse(stream_if_changed(self.path, ["<p>", "hi", "</p>"]))
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 1)
+
+    def test_same_size_different_content_is_replaced(self):
+        write_if_changed(self.path, "<p>hi</p>")
+        self.assertTrue(stream_if_changed(self.path, ["<p>yo</p>"]))
+        self.assertEqual(self.read(), "<p>yo</p>")
+
+    def test_failed_stream_keeps_old_file(self):
+        write_if_changed(self.path, "old")
+
+        def chunks():
+            yield "partial"
+            raise ValueError("render failed")
+
+        with self.assertRaises(ValueError):
+            stream_if_changed(self.path, chunks())
+        self.assertEqual(self.read(), "old")
+        self.assertEqual(os.listdir(self.tmp.name), ["index.html"])
+
+    def test_new_files_take_directory_mode_and_replacements_keep_theirs(self):
+        os.chmod(self.tmp.name, 0o750)
+        write_if_changed(self.path, "a")
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o640)
+        os.chmod(self.path, 0o604)
+        stream_if_changed(self.path, ["b"])
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o604)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,12 @@
+import contextlib
+import io
+import os
+import tempfile
 import unittest
-from page_generator import extract_title
+from build_context import BuildContext
+from page_generator import collect_pages, extract_title, generate_pages_pipelined, generate_pages_recursive
+from profiling import profiler
+from template import TemplateRegistry
 
 class TestPageGenerator(unittest.TestCase):
     def test_extract_title(self):
@@ -26,5 +33,177 @@ This is some text but there is no H1 header.
         title = extract_title(markdown)
         self.assertEqual(title, "A title with spaces")
 
+class TestGeneratePages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.docs = os.path.join(self.tmp.name, "docs")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        os.makedirs(os.path.join(self.content, "blog"))
+        for path, text in [
+            ("index.md", "# Home"),
+            ("blog/b.md", "# B"),
+            ("blog/a.md", "# A"),
+        ]:
+            with open(os.path.join(self.content, path), 'w') as f:
+                f.write(text)
+        with open(self.template, 'w') as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_collect_pages_is_sorted(self):
+        pages = collect_pages(self.content, self.docs)
+        self.assertEqual(
+            [os.path.relpath(dest, self.docs) for _, dest in pages],
+            ["blog/a.html", "blog/b.html", "index.html"],
+        )
+
+    def test_parallel_matches_serial(self):
+        generate_pages_recursive(self.content, self.template, self.docs)
+        with open(os.path.join(self.docs, "blog", "a.html")) as f:
+            serial = f.read()
+        os.remove(os.path.join(self.docs, "blog", "a.html"))
+        generate_pages_recursive(self.content, self.template, self.docs, jobs=2)
+        with open(os.path.join(self.docs, "blog", "a.html")) as f:
+            self.assertEqual(f.read(), serial)
+
+    def test_parallel_logs_pages_in_collection_order(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            generate_pages_recursive(self.content, self.template, self.docs, jobs=3)
+        logged = [line.split()[5] for line in output.getvalue().splitlines()]
+        self.assertEqual(logged, [dest for _, dest in collect_pages(self.content, self.docs)])
+
+    def test_front_matter_title_and_body(self):
+        with open(os.path.join(self.content, "index.md"), 'w') as f:
+            f.write("---\ntitle: Meta Title\n---\nJust text")
+        generate_pages_recursive(self.content, self.template, self.docs)
+        with open(os.path.join(self.docs, "index.html")) as f:
+            self.assertEqual(f.read(), "<title>Meta Title</title><div><p>Just text</p></div>")
+
+    def test_streaming_matches_in_memory(self):
+        with open(os.path.join(self.content, "index.md"), 'w') as f:
+            f.write("---\ndate: 2024\n---\nIntro [x](/a)\n\n# Home\n\n```\ncode\n\nmore\n```\n\n- a\n- b\n")
+        generate_pages_recursive(self.content, self.template, self.docs, "/site/")
+        with open(os.path.join(self.docs, "index.html")) as f:
+            in_memory = f.read()
+        context = BuildContext(stream_threshold=0)
+        generate_pages_recursive(self.content, self.template, self.docs, "/site/", context=context)
+        with open(os.path.join(self.docs, "index.html")) as f:
+            self.assertEqual(f.read(), in_memory)
+
+    def test_pipelined_matches_serial(self):
+        generate_pages_recursive(self.content, self.template, self.docs)
+        outputs = {}
+        for _, dest in collect_pages(self.content, self.docs):
+            with open(dest) as f:
+                outputs[dest] = f.read()
+            os.remove(dest)
+        context = BuildContext(io_threads=2)
+        generate_pages_recursive(self.content, self.template, self.docs, context=context)
+        for dest, expected in outputs.items():
+            with open(dest) as f:
+                self.assertEqual(f.read(), expected)
+
+    def test_unchanged_pages_are_not_rewritten(self):
+        context = BuildContext()
+        generate_pages_recursive(self.content, self.template, self.docs, context=context)
+        self.assertEqual((context.written, context.unchanged), (3, 0))
+        index = os.path.join(self.docs, "index.html")
+        os.utime(index, ns=(1, 1))
+        with open(os.path.join(self.content, "blog", "a.md"), 'w') as f:
+            f.write("# A changed")
+        context = BuildContext(io_threads=2)
+        generate_pages_recursive(self.content, self.template, self.docs, context=context)
+        self.assertEqual((context.written, context.unchanged), (1, 2))
+        self.assertEqual(os.stat(index).st_mtime_ns, 1)
+
+    def test_section_and_front_matter_templates(self):
+        layouts = os.path.join(self.tmp.name, "templates")
+        os.makedirs(layouts)
+        with open(os.path.join(layouts, "blog.html"), 'w') as f:
+            f.write("<h1>{{ Title }}</h1>{{ date }}")
+        with open(os.path.join(layouts, "plain.html"), 'w') as f:
+            f.write("{{ Title }}")
+        with open(os.path.join(self.content, "blog", "a.md"), 'w') as f:
+            f.write("---\ndate: 2024-01-02\n---\n# A")
+        with open(os.path.join(self.content, "index.md"), 'w') as f:
+            f.write("---\ntemplate: plain\n---\n# Home")
+        for context in (None, BuildContext(io_threads=2), BuildContext(stream_threshold=0)):
+            templates = TemplateRegistry(self.template, layouts, self.content)
+            generate_pages_recursive(self.content, templates, self.docs, context=context)
+            with open(os.path.join(self.docs, "blog", "a.html")) as f:
+                self.assertEqual(f.read(), "<h1>A</h1>2024-01-02")
+            with open(os.path.join(self.docs, "index.html")) as f:
+                self.assertEqual(f.read(), "Home")
+            with open(os.path.join(self.docs, "blog", "b.html")) as f:
+                self.assertEqual(f.read(), "<h1>B</h1>{{ date }}")
+
+    def profile(self, context):
+        profiler.enabled = True
+        profiler.take()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_pages_recursive(self.content, self.template, self.docs, context=context)
+            return profiler.take()
+        finally:
+            profiler.enabled = False
+
+    def test_streamed_pages_are_profiled(self):
+        profile = self.profile(BuildContext(stream_threshold=0))
+        self.assertLessEqual({"read", "markdown_to_html_node", "to_html", "write"}, set(profile["phases"]))
+        self.assertEqual(profile["phases"]["write"][1], 3)
+        self.assertEqual(sorted(profile["files"]), [source for source, _ in collect_pages(self.content, self.docs)])
+
+    def test_pipelined_pages_are_profiled(self):
+        profile = self.profile(BuildContext(io_threads=2))
+        self.assertLessEqual({"read", "markdown_to_html_node", "to_html", "write"}, set(profile["phases"]))
+        self.assertEqual(profile["phases"]["write"][1], 3)
+        self.assertEqual(sorted(profile["files"]), [source for source, _ in collect_pages(self.content, self.docs)])
+
+    def test_pipelined_buffer_is_bounded_by_bytes(self):
+        generate_pages_recursive(self.content, self.template, self.docs)
+        pages = collect_pages(self.content, self.docs)
+        outputs = {}
+        for _, dest in pages:
+            with open(dest) as f:
+                outputs[dest] = f.read()
+            os.remove(dest)
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_pipelined(pages, TemplateRegistry(self.template), io_threads=2, buffer=1)
+        for dest, expected in outputs.items():
+            with open(dest) as f:
+                self.assertEqual(f.read(), expected)
+
+    def test_pipelined_error_names_source(self):
+        with open(os.path.join(self.content, "blog", "b.md"), 'w') as f:
+            f.write("no title here")
+        with self.assertRaisesRegex(RuntimeError, "b.md"):
+            generate_pages_recursive(
+                self.content, self.template, self.docs, context=BuildContext(io_threads=2)
+            )
+
+    def test_streamed_and_serial_errors_name_source(self):
+        with open(os.path.join(self.content, "blog", "b.md"), 'w') as f:
+            f.write("no title here")
+        for context in (None, BuildContext(io_threads=2, stream_threshold=0)):
+            with self.assertRaisesRegex(RuntimeError, "b.md"):
+                generate_pages_recursive(self.content, self.template, self.docs, context=context)
+
+    def test_io_threads_reject_multiple_jobs(self):
+        with self.assertRaises(ValueError):
+            generate_pages_recursive(
+                self.content, self.template, self.docs, jobs=2, context=BuildContext(io_threads=2)
+            )
+
+    def test_parallel_error_names_source(self):
+        with open(os.path.join(self.content, "blog", "a.md"), 'w') as f:
+            f.write("no title here")
+        with self.assertRaisesRegex(RuntimeError, "a.md"):
+            generate_pages_recursive(self.content, self.template, self.docs, jobs=2)
+
+
 if __name__ == '__main__':
     unittest.main()
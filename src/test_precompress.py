@@ -0,0 +1,108 @@
+import gzip
+import os
+import stat
+import tempfile
+import unittest
+
+from build_context import BuildContext
+from page_generator import generate_pages_recursive
+from precompress import Compressor, compress_file
+
+
+class TestCompressFile(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "index.html")
+        self.write(self.path, "<p>hello</p>" * 200)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def test_gzip_sibling_round_trips(self):
+        result = compress_file(self.path, (".gz",))
+        self.assertEqual(result["status"], "compressed")
+        with gzip.open(self.path + ".gz", 'rt') as f:
+            self.assertEqual(f.read(), "<p>hello</p>" * 200)
+        self.assertLess(result["compressed"][".gz"], result["size"])
+
+    def test_fresh_sibling_is_skipped(self):
+        compress_file(self.path, (".gz",))
+        self.assertEqual(compress_file(self.path, (".gz",))["status"], "fresh")
+        later = os.stat(self.path + ".gz").st_mtime_ns + 1_000_000_000
+        os.utime(self.path, ns=(later, later))
+        self.assertEqual(compress_file(self.path, (".gz",))["status"], "compressed")
+
+    def test_small_file_drops_sibling(self):
+        compress_file(self.path, (".gz",))
+        self.write(self.path, "<p>hi</p>")
+        self.assertEqual(compress_file(self.path, (".gz",), min_size=100)["status"], "small")
+        self.assertFalse(os.path.exists(self.path + ".gz"))
+
+    def test_incompressible_file_is_not_counted_as_compressed(self):
+        path = os.path.join(self.tmp.name, "noise.js")
+        with open(path, 'wb') as f:
+            f.write(os.urandom(4096))
+        self.assertEqual(compress_file(path, (".gz",))["status"], "incompressible")
+        self.assertFalse(os.path.exists(path + ".gz"))
+
+    def test_sibling_takes_the_mode_of_its_directory(self):
+        os.chmod(self.tmp.name, 0o750)
+        compress_file(self.path, (".gz",))
+        self.assertEqual(stat.S_IMODE(os.stat(self.path + ".gz").st_mode), 0o640)
+
+
+class TestCompressor(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.docs = os.path.join(self.tmp.name, "docs")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        os.makedirs(os.path.join(self.content, "blog"))
+        os.makedirs(self.docs)
+        body = "\n\n".join(f"Paragraph {n} about hobbits." for n in range(100))
+        for path in ("index.md", "blog/a.md", "blog/b.md"):
+            with open(os.path.join(self.content, path), 'w') as f:
+                f.write(f"# {path}\n\n{body}")
+        with open(self.template, 'w') as f:
+            f.write("{{ Content }}")
+        with open(os.path.join(self.docs, "site.css"), 'w') as f:
+            f.write("body { margin: 0; }\n" * 100)
+        with open(os.path.join(self.docs, "gone.html.gz"), 'wb') as f:
+            f.write(b"stale")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, jobs=1, io_threads=0):
+        context = BuildContext(io_threads=io_threads, compressor=Compressor((".gz",), threads=2))
+        generate_pages_recursive(self.content, self.template, self.docs, jobs=jobs, context=context)
+        context.compressor.compress_tree(self.docs)
+        return context.compressor
+
+    def test_pages_and_static_files_are_compressed(self):
+        for jobs, io_threads in ((1, 0), (2, 0), (1, 2)):
+            for name in ("index.html", "blog/a.html", "blog/b.html", "site.css"):
+                path = os.path.join(self.docs, name + ".gz")
+                if os.path.exists(path):
+                    os.remove(path)
+            compressor = self.build(jobs, io_threads)
+            self.assertEqual(compressor.counts, {"compressed": 4, "fresh": 0, "small": 0, "incompressible": 0})
+            self.assertGreater(compressor.original_bytes[".gz"], compressor.compressed_bytes[".gz"])
+            self.assertTrue(os.path.exists(os.path.join(self.docs, "blog", "a.html.gz")))
+            self.assertFalse(os.path.exists(os.path.join(self.docs, "gone.html.gz")))
+
+    def test_thread_pool_is_shut_down(self):
+        compressor = self.build()
+        self.assertIsNone(compressor.pool)
+
+    def test_rebuild_of_unchanged_outputs_compresses_nothing(self):
+        self.build()
+        self.assertEqual(self.build().counts, {"compressed": 0, "fresh": 4, "small": 0, "incompressible": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
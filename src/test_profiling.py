@@ -0,0 +1,47 @@
+import unittest
+
+from profiling import Profiler
+
+
+class TestProfiler(unittest.TestCase):
+    def test_disabled_records_nothing(self):
+        profiler = Profiler()
+        with profiler.phase("parse"):
+            pass
+        self.assertEqual(profiler.phases, {})
+
+    def test_phase_counts_calls(self):
+        profiler = Profiler()
+        profiler.enabled = True
+        for _ in range(3):
+            with profiler.phase("parse"):
+                pass
+        self.assertEqual(profiler.phases["parse"][1], 3)
+
+    def test_merge_and_slowest_files(self):
+        worker = Profiler()
+        worker.record("write", 0.5)
+        worker.record_file("a.md", 0.1)
+        worker.record_file("b.md", 0.3)
+        profiler = Profiler()
+        profiler.record("write", 0.25)
+        profiler.merge(worker.take())
+        self.assertEqual(profiler.phases["write"], [0.75, 2])
+        self.assertEqual(profiler.slowest_files(1), [("b.md", 0.3)])
+        self.assertEqual(worker.phases, {})
+
+    def test_to_dict(self):
+        profiler = Profiler()
+        profiler.record("read", 0.002)
+        profiler.record_file("a.md", 0.002)
+        self.assertEqual(
+            profiler.to_dict(),
+            {
+                "phases": {"read": {"seconds": 0.002, "calls": 1}},
+                "slowest_files": [{"source": "a.md", "seconds": 0.002}],
+            },
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+
+from block_markdown import markdown_to_html_node
+from htmlnode import LeafNode
+from render_cache import RenderCache
+from textnode import TEXT_NODE_BUILDERS, TextType, register_text_type
+
+
+class TestRenderCache(unittest.TestCase):
+    def test_lru_eviction(self):
+        cache = RenderCache(maxsize=2)
+        cache.put("a", "A")
+        cache.put("b", "B")
+        cache.get("a")
+        cache.put("c", "C")
+        self.assertEqual(list(cache.entries), ["a", "c"])
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_cached_render_matches_uncached(self):
+        md = "# Title\n\nShared **footer** [link](/about)\n\n- a\n- b\n\nShared **footer** [link](/about)"
+        cache = RenderCache()
+        self.assertEqual(
+            markdown_to_html_node(md, "/site/", cache).to_html(),
+            markdown_to_html_node(md, "/site/").to_html(),
+        )
+        self.assertEqual((cache.hits, cache.misses), (1, 3))
+
+    def test_basepath_is_part_of_key(self):
+        cache = RenderCache()
+        markdown_to_html_node("[a](/x)", "/", cache)
+        html = markdown_to_html_node("[a](/x)", "/site/", cache).to_html()
+        self.assertEqual(html, '<div><p><a href="/site/x">a</a></p></div>')
+        self.assertEqual(cache.hits, 0)
+
+    def test_disk_store_shared_between_caches(self):
+        with tempfile.TemporaryDirectory() as directory:
+            md = "Some **boilerplate** text"
+            markdown_to_html_node(md, cache=RenderCache(directory=directory))
+            self.assertTrue(os.listdir(directory))
+            second = RenderCache(directory=directory)
+            html = markdown_to_html_node(md, cache=second).to_html()
+            self.assertEqual(html, "<div><p>Some <b>boilerplate</b> text</p></div>")
+            self.assertEqual((second.hits, second.misses), (1, 0))
+
+    def test_registered_builders_are_part_of_key(self):
+        cache = RenderCache()
+        markdown_to_html_node("Some **bold** text", cache=cache)
+        self.addCleanup(register_text_type, TextType.BOLD, TEXT_NODE_BUILDERS[TextType.BOLD])
+        register_text_type(TextType.BOLD, lambda node, basepath: LeafNode("strong", node.text))
+        html = markdown_to_html_node("Some **bold** text", cache=cache).to_html()
+        self.assertEqual(html, "<div><p>Some <strong>bold</strong> text</p></div>")
+        self.assertEqual(cache.hits, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
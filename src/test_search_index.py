@@ -0,0 +1,114 @@
+import json
+import os
+import tempfile
+import unittest
+
+import shutil
+
+from build_context import BuildContext
+from manifest import BuildManifest, file_hash
+from page_generator import generate_pages_recursive
+from inline_markdown import text_to_textnodes
+from search_index import SearchIndex, delta_decode, delta_encode, node_terms, shard_postings
+
+
+class TestSearchHelpers(unittest.TestCase):
+    def test_node_terms_skip_urls_and_markup(self):
+        nodes = text_to_textnodes("See [the Docs](/docs/x) and ![a cat](/cat.png) _now_ **x_y**")
+        self.assertEqual(node_terms(nodes), ["see", "the", "docs", "and", "cat", "now"])
+
+    def test_delta_round_trip(self):
+        self.assertEqual(delta_encode([2, 3, 10]), [2, 1, 7])
+        self.assertEqual(delta_decode([2, 1, 7]), [2, 3, 10])
+
+    def test_shards_are_size_bounded(self):
+        postings = {f"term{n:03}": [n] for n in range(100)}
+        shards = shard_postings(postings, 200)
+        self.assertGreater(len(shards), 1)
+        for shard in shards:
+            self.assertLessEqual(len(json.dumps(shard, separators=(",", ":"))), 200)
+        self.assertEqual(sum(len(shard) for shard in shards), 100)
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.docs = os.path.join(root, "docs")
+        self.search = os.path.join(self.docs, "search")
+        self.template = os.path.join(root, "template.html")
+        self.manifest_path = os.path.join(root, "manifest.json")
+        os.makedirs(os.path.join(self.content, "blog"))
+        for path, text in [
+            ("index.md", "# Home\n\nWelcome hobbits"),
+            ("blog/a.md", "# Alpha\n\nHobbits like second breakfast"),
+            ("blog/b.md", "# Beta\n\nElves and hobbits"),
+        ]:
+            with open(os.path.join(self.content, path), 'w') as f:
+                f.write(text)
+        with open(self.template, 'w') as f:
+            f.write("{{ Content }}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, jobs=1, manifest=None, basepath="/"):
+        context = BuildContext(search_index=SearchIndex(128))
+        generate_pages_recursive(self.content, self.template, self.docs, basepath, manifest, jobs, context)
+        # Titles and terms are gathered while rendering; sources are not read again.
+        shutil.move(self.content, self.content + ".moved")
+        try:
+            context.search_index.write(self.search, self.docs, basepath)
+        finally:
+            shutil.move(self.content + ".moved", self.content)
+        return self.load()
+
+    def load(self):
+        with open(os.path.join(self.search, "index.json")) as f:
+            index = json.load(f)
+        postings = {}
+        for shard in index["shards"]:
+            with open(os.path.join(self.search, shard["file"])) as f:
+                for term, deltas in json.load(f).items():
+                    self.assertTrue(shard["first"] <= term <= shard["last"])
+                    postings[term] = delta_decode(deltas)
+        return index["documents"], postings
+
+    def test_terms_map_to_documents(self):
+        documents, postings = self.build()
+        urls = [document["url"] for document in documents]
+        self.assertEqual(urls, ["/blog/a.html", "/blog/b.html", "/"])
+        self.assertEqual(documents[0]["title"], "Alpha")
+        self.assertEqual(postings["hobbits"], [0, 1, 2])
+        self.assertEqual(postings["elves"], [1])
+
+    def test_urls_include_basepath(self):
+        documents, _ = self.build(basepath="/site/")
+        self.assertEqual([document["url"] for document in documents], ["/site/blog/a.html", "/site/blog/b.html", "/site/"])
+
+    def test_code_is_not_indexed(self):
+        with open(os.path.join(self.content, "index.md"), 'w') as f:
+            f.write("# Home\n\n```\nsecret\n```")
+        _, postings = self.build(jobs=2)
+        self.assertNotIn("secret", postings)
+
+    def test_parallel_build_merges_worker_indexes(self):
+        serial = self.build()
+        self.assertEqual(self.build(jobs=2), serial)
+
+    def test_incremental_build_keeps_skipped_pages(self):
+        def build():
+            manifest = BuildManifest(self.manifest_path, file_hash(self.template), "/")
+            result = self.build(manifest=manifest)
+            manifest.save()
+            return manifest, result
+
+        _, first = build()
+        manifest, second = build()
+        self.assertEqual(manifest.skipped, 3)
+        self.assertEqual(second, first)
+
+
+if __name__ == "__main__":
+    unittest.main()
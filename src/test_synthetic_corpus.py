@@ -0,0 +1,29 @@
+import os
+import random
+import tempfile
+import unittest
+
+from block_markdown import BlockType, block_to_block_type, markdown_to_blocks
+from synthetic_corpus import generate_markdown, write_corpus
+
+
+class TestSyntheticCorpus(unittest.TestCase):
+    def test_generation_is_deterministic(self):
+        first = generate_markdown(random.Random(7), blocks=20)
+        second = generate_markdown(random.Random(7), blocks=20)
+        self.assertEqual(first, second)
+
+    def test_block_mix_is_respected(self):
+        md = generate_markdown(random.Random(1), blocks=10, block_mix={"code": 1})
+        types = [block_to_block_type(block) for block in markdown_to_blocks(md)]
+        self.assertEqual(types, [BlockType.HEADING] + [BlockType.CODE] * 10)
+
+    def test_write_corpus(self):
+        with tempfile.TemporaryDirectory() as directory:
+            paths = write_corpus(directory, pages=5, seed=3, blocks=4, depth=3)
+            self.assertEqual(len(paths), 5)
+            self.assertTrue(all(os.path.isfile(path) for path in paths))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+
+from template import Template, TemplateRegistry, register_asset_urls, rewrite_url
+
+
+class TestTemplate(unittest.TestCase):
+    def test_render_slots(self):
+        template = Template("<title>{{ Title }}</title><body>{{ Content }}</body>")
+        self.assertEqual(
+            template.render({"Title": "Hi", "Content": "<p>x</p>"}),
+            "<title>Hi</title><body><p>x</p></body>",
+        )
+
+    def test_literals_and_slots_are_split(self):
+        template = Template("a{{ Title }}b{{ Content }}c")
+        self.assertEqual(template.literals, ["a", "b", "c"])
+        self.assertEqual([name for name, _ in template.slots], ["Title", "Content"])
+
+    def test_unknown_slot_is_kept(self):
+        template = Template("{{ Title }} {{ Other }}")
+        self.assertEqual(template.render({"Title": "Hi"}), "Hi {{ Other }}")
+
+    def test_basepath_applied_to_literals_only(self):
+        template = Template('<link href="/index.css" />{{ Content }}', "/site/")
+        self.assertEqual(
+            template.render({"Content": 'text href="/raw'}),
+            '<link href="/site/index.css" />text href="/raw',
+        )
+
+    def test_asset_urls_applied_with_basepath(self):
+        self.addCleanup(register_asset_urls, {})
+        register_asset_urls({"/index.css": "/index.abc.css"})
+        template = Template('<link href="/index.css" /><a href="/">{{ Content }}</a>', "/site/")
+        self.assertEqual(template.literals[0], '<link href="/site/index.abc.css" /><a href="/site/">')
+
+    def test_rewrite_url(self):
+        self.assertEqual(rewrite_url("/images/a.png", "/site/"), "/site/images/a.png")
+        self.assertEqual(rewrite_url("https://boot.dev", "/site/"), "https://boot.dev")
+
+
+class TestTemplateRegistry(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.templates = os.path.join(self.tmp.name, "templates")
+        self.content = os.path.join(self.tmp.name, "content")
+        self.default = os.path.join(self.tmp.name, "template.html")
+        os.makedirs(os.path.join(self.templates, "partials"))
+        self.write(self.default, "{{> partials/header }}<main>{{ Content }}</main>")
+        self.write(os.path.join(self.templates, "partials", "header.html"), '<a href="/">{{ Title }}</a>')
+        self.write(os.path.join(self.templates, "blog.html"), "{{> partials/header }}<article>{{ Content }}</article>")
+        self.write(os.path.join(self.templates, "landing.html"), "<h1>{{ Title }}</h1>")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def registry(self):
+        return TemplateRegistry(self.default, self.templates, self.content, "/site/")
+
+    def test_includes_are_resolved_at_compile_time(self):
+        template = self.registry().default
+        self.assertEqual(template.literals, ['<a href="/site/">', "</a><main>", "</main>"])
+
+    def test_template_chosen_by_section_then_front_matter(self):
+        registry = self.registry()
+        post = os.path.join(self.content, "blog", "2024", "post.md")
+        self.assertEqual(registry.template_for(post).path, os.path.join(self.templates, "blog.html"))
+        self.assertIs(registry.template_for(os.path.join(self.content, "index.md")), registry.default)
+        self.assertIs(registry.template_for(post, {"template": "landing"}), registry.get("landing"))
+        with self.assertRaises(ValueError):
+            registry.template_for(post, {"template": "missing"})
+
+    def test_include_cycle_raises(self):
+        self.write(os.path.join(self.templates, "partials", "header.html"), "{{> blog }}")
+        with self.assertRaisesRegex(ValueError, "cycle"):
+            self.registry()
+
+    def test_fingerprint_covers_partials(self):
+        before = self.registry().fingerprint()
+        self.write(os.path.join(self.templates, "partials", "header.html"), "<nav></nav>")
+        self.assertNotEqual(self.registry().fingerprint(), before)
+
+    def test_without_template_dir(self):
+        self.write(self.default, "{{ Content }}")
+        registry = TemplateRegistry(self.default)
+        self.assertIs(registry.template_for("blog/post.md"), registry.default)
+
+
+if __name__ == "__main__":
+    unittest.main()
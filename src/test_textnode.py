@@ -44,6 +44,9 @@ class TestTextNode(unittest.TestCase):
         node2 = TextNode("This is a text node", TextType.TEXT, None)
         self.assertNotEqual(node, node2)
 
+    def test_no_instance_dict(self):
+        self.assertFalse(hasattr(TextNode("text", TextType.TEXT), "__dict__"))
+
 class TestTextNodeToHTMLNode(unittest.TestCase):
     def test_text(self):
         node = TextNode("This is a text node", TextType.TEXT)
@@ -78,7 +81,19 @@ class TestTextNodeToHTMLNode(unittest.TestCase):
         html_node = text_node_to_html_node(node)
         self.assertEqual(html_node.tag, "a")
         self.assertEqual(html_node.value, "Click here")
-        self.assertEqual(html_node.props, {"href": "https://www.example.com"})
+        self.assertEqual(html_node.props, (("href", "https://www.example.com"),))
+
+    def test_links_share_props(self):
+        first = text_node_to_html_node(TextNode("a", TextType.LINK, "/same"))
+        second = text_node_to_html_node(TextNode("b", TextType.LINK, "/same"))
+        self.assertIs(first.props, second.props)
+        self.assertEqual(second.to_html(), '<a href="/same">b</a>')
+
+    def test_link_and_image_basepath(self):
+        link = text_node_to_html_node(TextNode("Home", TextType.LINK, "/blog"), "/site/")
+        self.assertEqual(link.props, (("href", "/site/blog"),))
+        image = text_node_to_html_node(TextNode("alt", TextType.IMAGE, "/img.png"), "/site/")
+        self.assertEqual(image.props, (("src", "/site/img.png"), ("alt", "alt")))
 
 if __name__ == "__main__":
     unittest.main()
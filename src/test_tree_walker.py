@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+
+from tree_walker import PAGE, STATIC, make_output_dirs, walk_tree
+
+
+class TestWalkTree(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, "content")
+        self.dest = os.path.join(self.tmp.name, "docs")
+        os.makedirs(os.path.join(self.source, "blog", "post"))
+        for path, text in [
+            ("index.md", "# Home"),
+            ("notes.txt", "not a page"),
+            ("blog/post/index.md", "# Post"),
+        ]:
+            with open(os.path.join(self.source, path), 'w') as f:
+                f.write(text)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_pages_map_to_html(self):
+        entries = walk_tree(self.source, self.dest, PAGE)
+        self.assertEqual(
+            [(os.path.relpath(e.source, self.source), os.path.relpath(e.dest, self.dest)) for e in entries],
+            [
+                (os.path.join("blog", "post", "index.md"), os.path.join("blog", "post", "index.html")),
+                ("index.md", "index.html"),
+            ],
+        )
+
+    def test_static_keeps_every_file_with_stats(self):
+        entries = walk_tree(self.source, self.dest, STATIC)
+        self.assertEqual(len(entries), 3)
+        notes = [e for e in entries if e.source.endswith("notes.txt")][0]
+        self.assertEqual(notes.size, len("not a page"))
+        self.assertEqual(notes.mtime_ns, os.stat(notes.source).st_mtime_ns)
+
+    def test_missing_source_is_empty(self):
+        self.assertEqual(walk_tree(os.path.join(self.tmp.name, "nope"), self.dest), [])
+
+    def test_make_output_dirs_once_per_directory(self):
+        entries = walk_tree(self.source, self.dest, STATIC)
+        created = make_output_dirs(e.dest for e in entries)
+        self.assertEqual(created, {self.dest, os.path.join(self.dest, "blog", "post")})
+        self.assertTrue(os.path.isdir(os.path.join(self.dest, "blog", "post")))
+
+
+if __name__ == "__main__":
+    unittest.main()
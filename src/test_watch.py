@@ -0,0 +1,158 @@
+import os
+import tempfile
+import time
+import unittest
+
+from watch import SiteWatcher, diff_snapshots
+
+
+class TestDiffSnapshots(unittest.TestCase):
+    def test_changed_and_removed(self):
+        old = {"a": (1, 1), "b": (1, 1), "c": (1, 1)}
+        new = {"a": (1, 1), "b": (2, 2), "d": (1, 1)}
+        self.assertEqual(diff_snapshots(old, new), (["b", "d"], ["c"]))
+
+
+class TestSiteWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.static = os.path.join(root, "static")
+        self.docs = os.path.join(root, "docs")
+        self.template = os.path.join(root, "template.html")
+        os.makedirs(os.path.join(self.content, "blog"))
+        os.makedirs(self.static)
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post")
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.watcher = SiteWatcher(self.content, self.static, self.template, self.docs)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, 'w') as f:
+            f.write(text)
+        # Make sure the mtime moves even on coarse-grained filesystems.
+        stamp = time.time_ns() + 1_000_000_000
+        os.utime(path, ns=(stamp, stamp))
+
+    def read(self, *parts):
+        with open(os.path.join(self.docs, *parts)) as f:
+            return f.read()
+
+    def test_markdown_edit_rebuilds_only_that_page(self):
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Edited")
+        self.assertTrue(self.watcher.poll())
+        self.assertIn("Edited", self.read("blog", "post.html"))
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "index.html")))
+
+    def test_template_edit_rebuilds_all_pages(self):
+        self.write(self.template, "<h1>{{ Title }}</h1>")
+        self.watcher.poll()
+        self.assertEqual(self.read("index.html"), "<h1>Home</h1>")
+        self.assertEqual(self.read("blog", "post.html"), "<h1>Post</h1>")
+
+    def test_template_edit_keeps_rest_of_batch(self):
+        self.write(os.path.join(self.content, "about.md"), "# About")
+        self.watcher.poll()
+        self.write(self.template, "<h1>{{ Title }}</h1>")
+        self.write(os.path.join(self.static, "site.css"), "body {}")
+        self.write(os.path.join(self.content, "new.md"), "# New")
+        os.remove(os.path.join(self.content, "about.md"))
+        self.assertTrue(self.watcher.poll())
+        self.assertEqual(self.read("site.css"), "body {}")
+        self.assertEqual(self.read("new.html"), "<h1>New</h1>")
+        self.assertEqual(self.read("index.html"), "<h1>Home</h1>")
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "about.html")))
+        self.assertIsNone(self.watcher.failed)
+        self.assertFalse(self.watcher.poll())
+
+    def test_partial_edit_rebuilds_all_pages(self):
+        templates = os.path.join(self.tmp.name, "templates")
+        os.makedirs(templates)
+        self.write(os.path.join(templates, "head.html"), "<b>")
+        self.write(self.template, "{{> head }}{{ Title }}")
+        watcher = SiteWatcher(self.content, self.static, self.template, self.docs, template_dir=templates)
+        self.write(os.path.join(templates, "head.html"), "<i>")
+        watcher.poll()
+        self.assertEqual(self.read("index.html"), "<i>Home")
+        self.assertEqual(self.read("blog", "post.html"), "<i>Post")
+
+    def test_static_add_and_remove(self):
+        self.write(os.path.join(self.static, "site.css"), "body {}")
+        self.watcher.poll()
+        self.assertEqual(self.read("site.css"), "body {}")
+        os.remove(os.path.join(self.static, "site.css"))
+        self.watcher.poll()
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "site.css")))
+
+    def test_static_edit_through_hardlink(self):
+        source = os.path.join(self.static, "site.css")
+        self.write(source, "body {}")
+        os.makedirs(self.docs)
+        os.link(source, os.path.join(self.docs, "site.css"))
+        self.watcher.state = self.watcher.scan()
+        # Edited in place, so docs/site.css still points at the same inode.
+        self.write(source, "body {} p {}")
+        self.assertTrue(self.watcher.poll())
+        self.assertIsNone(self.watcher.failed)
+        self.assertFalse(os.path.samefile(source, os.path.join(self.docs, "site.css")))
+        self.assertEqual(self.read("site.css"), "body {} p {}")
+
+    def test_rebuild_drops_stale_siblings(self):
+        post = os.path.join(self.content, "blog", "post.md")
+        self.write(post, "# Edited")
+        self.watcher.poll()
+        sibling = os.path.join(self.docs, "blog", "post.html.gz")
+        self.write(sibling, "stale")
+        self.write(post, "# Again")
+        self.watcher.poll()
+        self.assertFalse(os.path.exists(sibling))
+
+    def test_no_change(self):
+        self.assertFalse(self.watcher.poll())
+
+    def test_failed_rebuild_is_retried_with_next_change(self):
+        post = os.path.join(self.content, "blog", "post.md")
+        self.write(post, "no title")
+        self.assertTrue(self.watcher.poll())
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog", "post.html")))
+        # Nothing changed since the failure, so it is not retried in a loop.
+        self.assertFalse(self.watcher.poll())
+        self.write(post, "# Fixed")
+        self.write(os.path.join(self.content, "index.md"), "# Home again")
+        self.assertTrue(self.watcher.poll())
+        self.assertEqual(self.read("blog", "post.html"), "<title>Fixed</title><div><h1>Fixed</h1></div>")
+        self.assertIn("Home again", self.read("index.html"))
+
+    def test_refresh_looks_only_at_reported_paths(self):
+        post = os.path.join(self.content, "blog", "post.md")
+        self.write(post, "# Edited")
+        self.write(os.path.join(self.content, "index.md"), "# Unreported")
+        self.assertTrue(self.watcher.refresh([post, os.path.join(self.tmp.name, "elsewhere.txt")]))
+        self.assertIn("Edited", self.read("blog", "post.html"))
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "index.html")))
+        self.assertFalse(self.watcher.refresh([post]))
+
+    def test_refresh_retries_failed_paths(self):
+        post = os.path.join(self.content, "blog", "post.md")
+        self.write(post, "no title")
+        self.watcher.refresh([post])
+        self.write(post, "# Fixed")
+        self.write(self.template, "{{ Title }}")
+        self.assertTrue(self.watcher.refresh([self.template]))
+        self.assertEqual(self.read("blog", "post.html"), "Fixed")
+
+    def test_refresh_handles_removed_directories(self):
+        blog = os.path.join(self.content, "blog")
+        self.watcher.refresh([os.path.join(blog, "post.md")])
+        os.remove(os.path.join(blog, "post.md"))
+        os.rmdir(blog)
+        self.assertTrue(self.watcher.refresh([blog]))
+        self.assertNotIn(os.path.join(blog, "post.md"), self.watcher.state)
+
+
+if __name__ == "__main__":
+    unittest.main()
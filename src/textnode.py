@@ -1,5 +1,8 @@
+from contextvars import ContextVar
 from enum import Enum
+from functools import lru_cache
 from htmlnode import LeafNode
+from template import rewrite_url
 
 class TextType(Enum):
     TEXT = "text"
@@ -10,6 +13,8 @@ class TextType(Enum):
     IMAGE = "image"
 
 class TextNode:
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type, url=None):
         self.text = text
         self.text_type = text_type
@@ -23,19 +28,52 @@ class TextNode:
         )
 
     def __repr__(self):
-        return f"TextNode({self.text}, {self.text_type.value}, {self.url})"
-
-def text_node_to_html_node(text_node):
-    if text_node.text_type == TextType.TEXT:
-        return LeafNode(None, text_node.text)
-    if text_node.text_type == TextType.BOLD:
-        return LeafNode("b", text_node.text)
-    if text_node.text_type == TextType.ITALIC:
-        return LeafNode("i", text_node.text)
-    if text_node.text_type == TextType.CODE:
-        return LeafNode("code", text_node.text)
-    if text_node.text_type == TextType.LINK:
-        return LeafNode("a", text_node.text, {"href": text_node.url})
-    if text_node.text_type == TextType.IMAGE:
-        return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
-    raise ValueError(f"invalid text type: {text_node.text_type}")
+        text_type = getattr(self.text_type, "value", self.text_type)
+        return f"TextNode({self.text}, {text_type}, {self.url})"
+
+def _text_to_html(text_node, basepath):
+    return LeafNode(None, text_node.text)
+
+def _bold_to_html(text_node, basepath):
+    return LeafNode("b", text_node.text)
+
+def _italic_to_html(text_node, basepath):
+    return LeafNode("i", text_node.text)
+
+def _code_to_html(text_node, basepath):
+    return LeafNode("code", text_node.text)
+
+# Links to the same target share one immutable props tuple.
+@lru_cache(maxsize=4096)
+def _href_props(href):
+    return (("href", href),)
+
+def _link_to_html(text_node, basepath):
+    return LeafNode("a", text_node.text, _href_props(rewrite_url(text_node.url, basepath)))
+
+# Image dimensions of the build being rendered; see BuildContext.rendering().
+ACTIVE_IMAGES = ContextVar("active_images", default=None)
+
+def _image_to_html(text_node, basepath):
+    images = ACTIVE_IMAGES.get()
+    if images is not None:
+        return images.image_to_html(text_node, basepath)
+    return LeafNode("img", "", (("src", rewrite_url(text_node.url, basepath)), ("alt", text_node.text)))
+
+TEXT_NODE_BUILDERS = {
+    TextType.TEXT: _text_to_html,
+    TextType.BOLD: _bold_to_html,
+    TextType.ITALIC: _italic_to_html,
+    TextType.CODE: _code_to_html,
+    TextType.LINK: _link_to_html,
+    TextType.IMAGE: _image_to_html,
+}
+
+def register_text_type(text_type, builder):
+    TEXT_NODE_BUILDERS[text_type] = builder
+
+def text_node_to_html_node(text_node, basepath="/"):
+    builder = TEXT_NODE_BUILDERS.get(text_node.text_type)
+    if builder is None:
+        raise ValueError(f"invalid text type: {text_node.text_type}")
+    return builder(text_node, basepath)
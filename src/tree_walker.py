@@ -0,0 +1,62 @@
+import os
+
+PAGE = "page"
+STATIC = "static"
+
+
+class TreeEntry:
+    __slots__ = ("source", "dest", "kind", "size", "mtime_ns")
+
+    def __init__(self, source, dest, kind, size, mtime_ns):
+        self.source = source
+        self.dest = dest
+        self.kind = kind
+        self.size = size
+        self.mtime_ns = mtime_ns
+
+    def __eq__(self, other):
+        return (
+            self.source == other.source
+            and self.dest == other.dest
+            and self.kind == other.kind
+            and self.size == other.size
+            and self.mtime_ns == other.mtime_ns
+        )
+
+    def __repr__(self):
+        return f"TreeEntry({self.source}, {self.dest}, {self.kind}, {self.size}, {self.mtime_ns})"
+
+
+def _walk(source_dir_path, dest_dir_path, kind, entries):
+    with os.scandir(source_dir_path) as it:
+        children = sorted(it, key=lambda entry: entry.name)
+    for entry in children:
+        dest_path = os.path.join(dest_dir_path, entry.name)
+        if entry.is_dir():
+            _walk(entry.path, dest_path, kind, entries)
+            continue
+        if not entry.is_file():
+            continue
+        if kind == PAGE:
+            if not entry.name.endswith(".md"):
+                continue
+            dest_path = dest_path[:-len(".md")] + ".html"
+        st = entry.stat()
+        entries.append(TreeEntry(entry.path, dest_path, kind, st.st_size, st.st_mtime_ns))
+
+
+def walk_tree(source_dir_path, dest_dir_path, kind=STATIC):
+    entries = []
+    if os.path.isdir(source_dir_path):
+        _walk(source_dir_path, dest_dir_path, kind, entries)
+    return entries
+
+
+def make_output_dirs(dest_paths):
+    created = set()
+    for dest_path in dest_paths:
+        dest_dir = os.path.dirname(dest_path)
+        if dest_dir and dest_dir not in created:
+            os.makedirs(dest_dir, exist_ok=True)
+            created.add(dest_dir)
+    return created
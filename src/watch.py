@@ -0,0 +1,236 @@
+import functools
+import os
+import queue
+import shutil
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+try:
+    from watchdog.observers import Observer
+except ImportError:
+    Observer = None
+
+from copystatic import unlink_output
+from page_generator import generate_page
+from precompress import remove_siblings
+from template import TemplateRegistry
+from tree_walker import walk_tree
+
+# Without watchdog the whole tree is rescanned this often, which costs more on big sites.
+POLL_INTERVAL = 0.25
+# Events this close together (one editor save) are rebuilt as a single batch.
+SETTLE_TIME = 0.02
+
+
+def snapshot(path):
+    if os.path.isfile(path):
+        st = os.stat(path)
+        return {path: (st.st_size, st.st_mtime_ns)}
+    return {entry.source: (entry.size, entry.mtime_ns) for entry in walk_tree(path, path)}
+
+
+def diff_snapshots(old, new):
+    changed = sorted(path for path, stamp in new.items() if old.get(path) != stamp)
+    removed = sorted(path for path in old if path not in new)
+    return changed, removed
+
+
+class SiteWatcher:
+    def __init__(self, content_dir, static_dir, template_path, dest_dir, basepath="/", context=None, template_dir=None):
+        self.content_dir = content_dir
+        self.static_dir = static_dir
+        self.template_path = template_path
+        self.template_dir = template_dir
+        self.dest_dir = dest_dir
+        self.basepath = basepath
+        self.context = context
+        self.templates = self.load_templates()
+        self.state = self.scan()
+        # Tree state (polling) or paths (events) of a failed rebuild, retried with the next change.
+        self.failed = None
+        self.pending = set()
+
+    def load_templates(self):
+        return TemplateRegistry(self.template_path, self.template_dir, self.content_dir, self.basepath)
+
+    def watched_paths(self):
+        return [
+            path
+            for path in (self.content_dir, self.static_dir, self.template_path, self.template_dir)
+            if path is not None
+        ]
+
+    def scan(self):
+        state = {}
+        for path in self.watched_paths():
+            state.update(snapshot(path))
+        return state
+
+    def state_path(self, path):
+        # Event paths are spelled like the watched roots, which is how scan() keys the state.
+        for root in self.watched_paths():
+            if _is_within(path, root):
+                relative = os.path.relpath(os.path.abspath(path), os.path.abspath(root))
+                return root if relative == "." else os.path.join(root, relative)
+        return None
+
+    def is_template(self, path):
+        if path == self.template_path:
+            return True
+        return self.template_dir is not None and _is_within(path, self.template_dir)
+
+    def page_dest(self, from_path):
+        relative = os.path.relpath(from_path, self.content_dir)
+        return str(Path(self.dest_dir, relative).with_suffix(".html"))
+
+    def static_dest(self, from_path):
+        return os.path.join(self.dest_dir, os.path.relpath(from_path, self.static_dir))
+
+    def is_page(self, path):
+        return path.endswith(".md") and _is_within(path, self.content_dir)
+
+    def rebuild(self, changed, removed):
+        templates_changed = [path for path in changed + removed if self.is_template(path)]
+        if templates_changed:
+            print(f"Template {templates_changed[0]} changed, regenerating all pages")
+            self.templates = self.load_templates()
+            # Every current page, plus the rest of the batch (static files, partials).
+            pages = {path for path in self.state if self.is_page(path)}
+            pages.update(path for path in changed if self.is_page(path))
+            pages.difference_update(removed)
+            changed = [path for path in changed if not self.is_page(path)] + sorted(pages)
+
+        for path in removed:
+            if self.is_page(path):
+                dest_path = self.page_dest(path)
+            elif _is_within(path, self.static_dir):
+                dest_path = self.static_dest(path)
+            else:
+                continue
+            if os.path.isfile(dest_path):
+                print(f" - removing {dest_path}")
+                os.remove(dest_path)
+                remove_siblings(dest_path)
+
+        compressor = self.context.compressor if self.context is not None else None
+        for path in changed:
+            if self.is_page(path):
+                dest_path = self.page_dest(path)
+                generate_page(path, self.templates, dest_path, self.basepath, self.context)
+            elif _is_within(path, self.static_dir):
+                dest_path = self.static_dest(path)
+                print(f" * {path} -> {dest_path}")
+                os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+                unlink_output(dest_path)
+                shutil.copy(path, dest_path)
+                if compressor is not None:
+                    compressor.submit(dest_path)
+            else:
+                continue
+            if compressor is None:
+                # Siblings from an earlier precompressed build would be served instead.
+                remove_siblings(dest_path)
+
+    def try_rebuild(self, changed, removed):
+        started = time.perf_counter()
+        try:
+            self.rebuild(changed, removed)
+            if self.context is not None and self.context.compressor is not None:
+                self.context.compressor.finish()
+        except Exception as e:
+            print(f"Rebuild failed: {e}")
+            return False
+        print(f"Rebuilt in {(time.perf_counter() - started) * 1000:.1f} ms")
+        return True
+
+    def poll(self):
+        state = self.scan()
+        if state == self.failed:
+            return False
+        changed, removed = diff_snapshots(self.state, state)
+        if not changed and not removed:
+            return False
+        if self.try_rebuild(changed, removed):
+            self.state = state
+            self.failed = None
+        else:
+            # The last good state is kept, so the failed files are rebuilt with the next edit.
+            self.failed = state
+        return True
+
+    def refresh(self, paths):
+        # Event-driven counterpart of poll(): only the reported paths are looked at.
+        paths = {path for path in map(self.state_path, paths) if path is not None} | self.pending
+        old = {}
+        new = {}
+        for path in paths:
+            old.update((known, stamp) for known, stamp in self.state.items() if known == path or _is_within(known, path))
+            new.update(snapshot(path))
+        changed, removed = diff_snapshots(old, new)
+        if not changed and not removed:
+            return False
+        if self.try_rebuild(changed, removed):
+            for path in removed:
+                del self.state[path]
+            self.state.update(new)
+            self.pending = set()
+        else:
+            self.pending = paths
+        return True
+
+    def run(self, interval=POLL_INTERVAL):
+        print(f"Watching {', '.join(self.watched_paths())}...")
+        if Observer is None:
+            print(f"Install watchdog for change notifications; polling every {interval * 1000:.0f} ms")
+            while True:
+                self.poll()
+                time.sleep(interval)
+
+        events = queue.Queue()
+        observer = Observer()
+        handler = _EventQueue(events)
+        for path in self.watched_paths():
+            if os.path.isdir(path):
+                observer.schedule(handler, path, recursive=True)
+            else:
+                observer.schedule(handler, os.path.dirname(path) or ".", recursive=False)
+        observer.start()
+        try:
+            while True:
+                paths = {events.get()}
+                time.sleep(SETTLE_TIME)
+                while not events.empty():
+                    paths.add(events.get_nowait())
+                self.refresh(paths)
+        finally:
+            observer.stop()
+            observer.join()
+
+
+class _EventQueue:
+    def __init__(self, events):
+        self.events = events
+
+    def dispatch(self, event):
+        # A directory's own mtime changes with every file event inside it.
+        if event.is_directory and event.event_type == "modified":
+            return
+        self.events.put(event.src_path)
+        dest_path = getattr(event, "dest_path", "")
+        if dest_path:
+            self.events.put(dest_path)
+
+
+def _is_within(path, directory):
+    return os.path.commonpath([os.path.abspath(path), os.path.abspath(directory)]) == os.path.abspath(directory)
+
+
+def serve(directory, port=8888):
+    handler = functools.partial(SimpleHTTPRequestHandler, directory=directory)
+    server = ThreadingHTTPServer(("", port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    print(f"Serving {directory} at http://localhost:{port}/")
+    return server, thread